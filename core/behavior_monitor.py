@@ -6,10 +6,11 @@ Monitors input patterns (Keystrokes/Mouse) for bot-like behavior
 import time
 import threading
 import random
-import statistics
 from datetime import datetime
 from typing import Callable, List, Dict, Any, Optional
 
+import numpy as np
+
 # --- Constants (Bug 14) ---
 BEHAVIOR_CHECK_INTERVAL = 1.0  # seconds
 STDEV_THRESHOLD = 20           # ms
@@ -70,9 +71,10 @@ class BehavioralMonitor:
         description = "[SIMULATED] Mechanical Input (Bot-like Pattern)"
 
         # 2. Analyze
-        try:
-            stdev = statistics.stdev(timings)
-        except Exception as e:
+        # Sample standard deviation; fewer than two intervals can't show regularity
+        if len(timings) > 1:
+            stdev = float(np.asarray(timings, dtype=np.float32).std(ddof=1))
+        else:
             stdev = 100
         
         if stdev < STDEV_THRESHOLD: # Suspiciously regular
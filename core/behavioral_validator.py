@@ -5,15 +5,17 @@ Natural Human Rhythm and Mechanical Bot/Keylogger Injection.
 """
 
 import os
-import random
 import time
 import json
 from datetime import datetime
+
+import numpy as np
 from dotenv import load_dotenv
 
 # Load environment
 load_dotenv()
 api_key = os.getenv('GEMINI_API_KEY')
+_rng = np.random.default_rng(0)  # fixed seed: the same human sample on every run
 
 def test_behavior():
     print("="*70)
@@ -28,7 +30,7 @@ def test_behavior():
     analyzer = GeminiBehaviorAnalyzer(api_key)
 
     # 1. Simulate HUMAN TYPING (High variance, natural jitter)
-    human_timings = [random.randint(80, 280) for _ in range(25)]
+    human_timings = _rng.integers(80, 281, size=25).tolist()  # plain ints for the JSON prompt
     
     # 2. Simulate BOT/KEYLOGGER (Mechanical, zero variance, fixed 10ms delay)
     bot_timings = [10 for _ in range(25)]
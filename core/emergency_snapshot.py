@@ -4,16 +4,101 @@ Ultra-fast evidence capture before deletion (<100ms)
 Cross-platform support for Windows, Linux, and Mac
 """
 
+import atexit
+import mmap
 import os
+import queue
 import shutil
 import subprocess
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import platform
 
+import orjson
+
+from utils.evidence_vault import atomic_write
+
+# --- Constants ---
+SNAPSHOT_WORKERS = 6        # one slot per capture task type
+SNAPSHOT_TIMEOUT = 10       # seconds, for the whole capture batch
+ASYNC_COPY_THRESHOLD = 128 * 1024  # bytes; larger log copies are offloaded
+ASYNC_COPY_DEPTH = 4        # once this many copies are in flight, offload the rest too
+COPY_WORKERS = 4
+COPY_BUFFER_SIZE = 64 * 1024
+COPY_BUFFER_POOL = SNAPSHOT_WORKERS + COPY_WORKERS  # one buffer per concurrent copier
+MAX_SNAPSHOT_PROCESSES = 100
+FS_METADATA_LIMIT = 100_000  # bytes of filesystem listing kept
+FS_METADATA_TIMEOUT = 10     # seconds
+SNAPSHOT_RING_SLOTS = 4
+SNAPSHOT_SLOT_SIZE = 4 * 1024 * 1024  # 4 MB staging arena per in-flight snapshot
+SNAPSHOT_FLUSH_TIMEOUT = 30  # seconds a reader waits for one snapshot's staged evidence
+
+# Platform facts never change at runtime; resolve them once instead of per snapshot
+_OS_NAME = platform.system()
+_OS_TYPE = _OS_NAME.lower()
+_HOSTNAME = platform.node()
+_OS_VERSION = platform.version()
+
+# Snapshot ID -> Event set once its staged evidence is on disk; shared by every engine in the process
+_pending_flushes: Dict[str, threading.Event] = {}
+_pending_lock = threading.Lock()
+
+
+def wait_for_snapshot(snapshot_id: str, timeout: Optional[float] = SNAPSHOT_FLUSH_TIMEOUT) -> bool:
+    """
+    Block until a snapshot's staged evidence has been flushed to disk
+    
+    Args:
+        snapshot_id: Snapshot to wait for
+        timeout: Seconds to wait (None waits forever)
+    
+    Returns:
+        True if the snapshot is on disk (or was never staged), False on timeout
+    """
+    with _pending_lock:
+        flushed = _pending_flushes.get(snapshot_id)
+    return flushed is None or flushed.wait(timeout)
+
+
+class _SnapshotSlot:
+    """One slot of the in-memory snapshot ring: an mmap arena plus the files staged in it"""
+    
+    def __init__(self, size: int):
+        self.arena = mmap.mmap(-1, size)
+        self.entries = []  # (path, offset, length)
+        self.used = 0
+        self.sealed = False
+        self.snapshot_id = None
+        self.flushed = None  # Event of the snapshot currently staged here
+        self.lock = threading.Lock()
+    
+    def stage(self, path: Path, data: bytes) -> bool:
+        """Copy data into the arena; False if the slot is full or already handed off"""
+        with self.lock:
+            end = self.used + len(data)
+            if self.sealed or end > len(self.arena):
+                return False
+            self.arena[self.used:end] = data
+            self.entries.append((path, self.used, len(data)))
+            self.used = end
+            return True
+    
+    def seal(self):
+        with self.lock:
+            self.sealed = True
+    
+    def reset(self):
+        with self.lock:
+            self.entries.clear()
+            self.used = 0
+            self.sealed = False
+            self.snapshot_id = None
+            self.flushed = None
+
 
 class EmergencySnapshotEngine:
     """
@@ -21,12 +106,40 @@ class EmergencySnapshotEngine:
     Automatically adapts to Windows, Linux, or Mac
     """
     
-    def __init__(self, evidence_vault_path: str = "./evidence", capture_network: bool = True):
+    def __init__(self, evidence_vault_path: str = "./evidence", capture_network: bool = True,
+                 async_copy_threshold: int = ASYNC_COPY_THRESHOLD):
         self.vault_path = Path(evidence_vault_path)
         self.capture_network = capture_network
-        self.os_type = platform.system().lower()
+        self.async_copy_threshold = async_copy_threshold
+        self.os_type = _OS_TYPE
+        # Publish evidence files via the vault's atomic_write so none is ever seen half-written
+        self._atomic_publish = _OS_TYPE == 'linux' and hasattr(os, 'O_TMPFILE')
         self.snapshots_dir = self.vault_path / "emergency_snapshots"
         self.snapshots_dir.mkdir(parents=True, exist_ok=True)
+        if self._atomic_publish:
+            self._check_atomic_publish()
+        # Persistent worker pool: avoids paying thread creation per capture task
+        # on the <100ms path. Workers are reused across snapshots.
+        self._executor = ThreadPoolExecutor(max_workers=SNAPSHOT_WORKERS, thread_name_prefix="snapshot")
+        # Separate pool for large file copies so a capture task never waits on its own pool
+        self._copy_executor = ThreadPoolExecutor(max_workers=COPY_WORKERS, thread_name_prefix="snapshot-copy")
+        # Copy buffers allocated once and reused by every snapshot
+        self._copy_buffers = queue.SimpleQueue()
+        for _ in range(COPY_BUFFER_POOL):
+            self._copy_buffers.put(bytearray(COPY_BUFFER_SIZE))
+        self._boot_time = None  # Linux btime, read once on first /proc scan
+        
+        # In-memory snapshot ring: capture output is staged in a slot and a
+        # background thread flushes it, keeping disk writes off the hot path
+        self._free_slots = queue.Queue()
+        for _ in range(SNAPSHOT_RING_SLOTS):
+            self._free_slots.put(_SnapshotSlot(SNAPSHOT_SLOT_SIZE))
+        self._closed = False
+        self._active_slots: Dict[Path, _SnapshotSlot] = {}
+        self._flush_queue = queue.Queue()
+        self._flush_thread = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flush_thread.start()
+        atexit.register(self.close)
         
     def emergency_snapshot(self, threat_type: str, command: str, process_info: Dict) -> str:
         """
@@ -40,9 +153,17 @@ class EmergencySnapshotEngine:
         Returns:
             Snapshot ID (always returns valid ID, even if some captures fail)
         """
-        snapshot_id = f"SNAP-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
-        snapshot_dir = self.snapshots_dir / snapshot_id
-        snapshot_dir.mkdir(parents=True, exist_ok=True)
+        if self._closed:
+            raise ValueError("Snapshot engine is closed")
+        # Microsecond IDs, and mkdir claims the directory: two snapshots never share a folder or ring slot
+        while True:
+            snapshot_id = f"SNAP-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}"
+            snapshot_dir = self.snapshots_dir / snapshot_id
+            try:
+                snapshot_dir.mkdir(parents=True)
+                break
+            except FileExistsError:
+                continue
         
         print(f"\n⚡ EMERGENCY SNAPSHOT TRIGGERED!")
         print(f"   Snapshot ID: {snapshot_id}")
@@ -60,7 +181,7 @@ class EmergencySnapshotEngine:
             'threat_type': threat_type,
             'command': command,
             'process_info': process_info,
-            'os_type': self.os_type,
+            'os_type': _OS_TYPE,
             'evidence_collected': []
         }
         
@@ -68,53 +189,52 @@ class EmergencySnapshotEngine:
             json.dump(metadata, f, indent=2)
         
         # Execute parallel snapshots based on threat type
-        threads = []
+        tasks = []
         evidence_types = []
         
         # ALWAYS capture event logs for ALL threats (critical forensic evidence)
-        threads.append(threading.Thread(
-            target=self._snapshot_event_logs,
-            args=(snapshot_dir,)
-        ))
+        tasks.append((self._snapshot_event_logs, (snapshot_dir,)))
         evidence_types.append('event_logs')
         
         if threat_type == 'vss_deletion' or threat_type == 'vss_manipulation':
-            threads.append(threading.Thread(
-                target=self._snapshot_vss_state,
-                args=(snapshot_dir,)
-            ))
+            tasks.append((self._snapshot_vss_state, (snapshot_dir,)))
             evidence_types.append('vss_state')
         
         if threat_type == 'file_wiping':
-            threads.append(threading.Thread(
-                target=self._snapshot_filesystem_metadata,
-                args=(snapshot_dir,)
-            ))
+            tasks.append((self._snapshot_filesystem_metadata, (snapshot_dir,)))
             evidence_types.append('filesystem_metadata')
         
         # Always capture process state and memory info
-        threads.append(threading.Thread(
-            target=self._snapshot_process_state,
-            args=(snapshot_dir, process_info)
-        ))
+        tasks.append((self._snapshot_process_state, (snapshot_dir, process_info)))
         evidence_types.append('process_state')
         
         # Capture network state if enabled
         if self.capture_network:
-            threads.append(threading.Thread(
-                target=self._snapshot_network_state,
-                args=(snapshot_dir,)
-            ))
+            tasks.append((self._snapshot_network_state, (snapshot_dir,)))
             evidence_types.append('network_state')
         
-        # Start all threads (parallel execution)
-        for thread in threads:
-            thread.daemon = True  # Don't block if thread hangs
-            thread.start()
-        
-        # Wait for all to complete (with timeout)
-        for thread in threads:
-            thread.join(timeout=10)  # Max 10s per thread
+        # Claim a ring slot for this snapshot (all slots busy -> write through)
+        try:
+            slot = self._free_slots.get_nowait()
+            slot.snapshot_id = snapshot_id
+            slot.flushed = threading.Event()
+            with _pending_lock:
+                _pending_flushes[snapshot_id] = slot.flushed
+            self._active_slots[snapshot_dir] = slot
+        except queue.Empty:
+            slot = None
+        
+        # Submit the whole batch to the shared pool (parallel execution)
+        futures = [self._executor.submit(target, *args) for target, args in tasks]
+        
+        # Wait for the batch to complete (with timeout); a hung task doesn't block us
+        wait(futures, timeout=SNAPSHOT_TIMEOUT)
+        
+        # Hand the staged output to the background flusher
+        if slot is not None:
+            self._active_slots.pop(snapshot_dir, None)
+            slot.seal()
+            self._flush_queue.put(slot)
         
         # Update metadata with what was collected
         metadata['evidence_collected'] = evidence_types
@@ -133,11 +253,11 @@ class EmergencySnapshotEngine:
     def _snapshot_event_logs(self, snapshot_dir: Path):
         """Snapshot event logs (OS-specific)"""
         try:
-            if self.os_type == 'windows':
+            if _OS_TYPE == 'windows':
                 self._snapshot_windows_event_logs(snapshot_dir)
-            elif self.os_type == 'linux':
+            elif _OS_TYPE == 'linux':
                 self._snapshot_linux_logs(snapshot_dir)
-            elif self.os_type == 'darwin':  # Mac
+            elif _OS_TYPE == 'darwin':  # Mac
                 self._snapshot_mac_logs(snapshot_dir)
         except Exception as e:
             print(f"   ⚠️  [WARN] Log snapshot failed: {e}")
@@ -149,40 +269,31 @@ class EmergencySnapshotEngine:
         
         log_types = ['Security', 'System', 'Application']
         
-        for log_type in log_types:
-            try:
-                output_file = logs_dir / f"{log_type}.evtx"
-                # Export event log (requires admin)
-                subprocess.run([
-                    'wevtutil', 'epl', log_type, str(output_file)
-                ], capture_output=True, timeout=5, text=True, check=False)
-                
-            except Exception as e:
-                print(f"   ⚠️  [WARN] Failed to export {log_type}: {e}")
+        # Export all event logs concurrently (requires admin)
+        self._run_commands([
+            ['wevtutil', 'epl', log_type, str(logs_dir / f"{log_type}.evtx")]
+            for log_type in log_types
+        ], timeout=5)
     
     def _capture_log_metadata(self, log_type: str, logs_dir: Path):
         """Capture event log metadata when full export isn't available"""
         try:
             metadata_file = logs_dir / f"{log_type}_metadata.txt"
             
-            # Get log info using wevtutil (doesn't require admin)
-            result = subprocess.run([
-                'wevtutil', 'gli', log_type
-            ], capture_output=True, timeout=5, text=True)
+            # Get log info (doesn't require admin) and recent events in one flight
+            result, count_result = self._run_commands([
+                ['wevtutil', 'gli', log_type],
+                ['wevtutil', 'qe', log_type, '/c:10', '/rd:true', '/f:text']
+            ], timeout=5)
             
-            if result.returncode == 0:
+            if result and result.returncode == 0:
                 with open(metadata_file, 'w') as f:
                     f.write(f"Event Log Metadata: {log_type}\n")
                     f.write("=" * 50 + "\n\n")
                     f.write(result.stdout)
                     f.write("\n\nNote: Full log export requires admin privileges\n")
             
-            # Also try to get recent event count
-            count_result = subprocess.run([
-                'wevtutil', 'qe', log_type, '/c:10', '/rd:true', '/f:text'
-            ], capture_output=True, timeout=5, text=True)
-            
-            if count_result.returncode == 0:
+            if count_result and count_result.returncode == 0:
                 recent_file = logs_dir / f"{log_type}_recent_events.txt"
                 with open(recent_file, 'w') as f:
                     f.write(f"Recent Events from {log_type} Log\n")
@@ -192,6 +303,37 @@ class EmergencySnapshotEngine:
         except Exception as e:
             print(f"   ⚠️  [WARN] Failed to capture metadata for {log_type}: {e}")
     
+    def _run_commands(self, commands: List[List[str]], timeout: float) -> List[Optional[subprocess.CompletedProcess]]:
+        """
+        Launch all commands at once, then drain them against a shared deadline
+        
+        Returns one CompletedProcess per command (None if it failed to launch or timed out)
+        """
+        procs = []
+        for cmd in commands:
+            try:
+                procs.append(subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True))
+            except Exception as e:
+                print(f"   ⚠️  [WARN] Failed to launch {cmd[0]}: {e}")
+                procs.append(None)
+        
+        deadline = time.time() + timeout
+        results = []
+        for cmd, proc in zip(commands, procs):
+            if proc is None:
+                results.append(None)
+                continue
+            try:
+                stdout, stderr = proc.communicate(timeout=max(0, deadline - time.time()))
+                results.append(subprocess.CompletedProcess(cmd, proc.returncode, stdout, stderr))
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.communicate()
+                print(f"   ⚠️  [WARN] Timed out: {' '.join(cmd[:3])}")
+                results.append(None)
+        
+        return results
+    
     def _snapshot_linux_logs(self, snapshot_dir: Path):
         """Snapshot Linux system logs"""
         logs_dir = snapshot_dir / "system_logs"
@@ -204,13 +346,64 @@ class EmergencySnapshotEngine:
             '/var/log/audit/audit.log'
         ]
         
+        # Small logs are copied inline; large ones (or anything queued behind
+        # ASYNC_COPY_DEPTH in-flight copies) are offloaded so one huge audit.log
+        # doesn't serialize the rest of the capture.
+        offloaded = {}
         for log_file in log_files:
             try:
-                if os.path.exists(log_file):
-                    dest = logs_dir / Path(log_file).name
-                    shutil.copy2(log_file, dest)
+                size = os.stat(log_file).st_size
+            except FileNotFoundError:
+                continue
+            except Exception as e:
+                print(f"   ⚠️  [WARN] Failed to copy {log_file}: {e}")
+                continue
+            
+            dest = logs_dir / Path(log_file).name
+            if size > self.async_copy_threshold or len(offloaded) >= ASYNC_COPY_DEPTH:
+                offloaded[self._copy_executor.submit(self._copy_file, log_file, dest)] = log_file
+                continue
+            
+            try:
+                self._copy_file(log_file, dest)
             except Exception as e:
                 print(f"   ⚠️  [WARN] Failed to copy {log_file}: {e}")
+        
+        done, _ = wait(offloaded, timeout=SNAPSHOT_TIMEOUT)
+        for future in done:
+            if future.exception():
+                print(f"   ⚠️  [WARN] Failed to copy {offloaded[future]}: {future.exception()}")
+    
+    def _copy_file(self, source: str, dest: Path):
+        """Copy a file with metadata (copy2 semantics): sendfile on Linux, pooled buffer elsewhere"""
+        if _OS_TYPE == 'linux':
+            # Zero-copy: sendfile(2) moves the bytes in-kernel, sized from one fstat
+            with open(source, 'rb') as src, open(dest, 'wb') as dst:
+                remaining = os.fstat(src.fileno()).st_size
+                offset = 0
+                while remaining > 0:
+                    sent = os.sendfile(dst.fileno(), src.fileno(), offset, remaining)
+                    if sent == 0:
+                        break  # Source truncated under us (e.g. log rotated mid-copy)
+                    offset += sent
+                    remaining -= sent
+            shutil.copystat(source, dest)
+            return
+        
+        try:
+            buffer = self._copy_buffers.get_nowait()
+        except queue.Empty:
+            buffer = bytearray(COPY_BUFFER_SIZE)
+        try:
+            with memoryview(buffer) as view, open(source, 'rb') as src, open(dest, 'wb') as dst:
+                while True:
+                    n = src.readinto(view)
+                    if not n:
+                        break
+                    dst.write(view[:n])
+        finally:
+            self._copy_buffers.put(buffer)
+        shutil.copystat(source, dest)
     
     def _snapshot_mac_logs(self, snapshot_dir: Path):
         """Snapshot Mac system logs"""
@@ -232,17 +425,16 @@ class EmergencySnapshotEngine:
     
     def _snapshot_vss_state(self, snapshot_dir: Path):
         """Snapshot Volume Shadow Copy state (Windows only)"""
-        if self.os_type != 'windows':
+        if _OS_TYPE != 'windows':
             return
         
         try:
             vss_file = snapshot_dir / "vss_state.txt"
             result = subprocess.run([
                 'vssadmin', 'list', 'shadows'
-            ], capture_output=True, text=True, timeout=5)
+            ], capture_output=True, timeout=5)
             
-            with open(vss_file, 'w') as f:
-                f.write(result.stdout)
+            self._write_evidence(vss_file, result.stdout)
         except Exception as e:
             print(f"   ⚠️  [WARN] VSS snapshot failed: {e}")
     
@@ -251,59 +443,140 @@ class EmergencySnapshotEngine:
         try:
             metadata_file = snapshot_dir / "filesystem_metadata.txt"
             
-            if self.os_type == 'windows':
+            if _OS_TYPE == 'windows':
                 # FIXED: Avoid shell=True for security (Bug 2)
-                result = subprocess.run([
-                    'cmd', '/c', 'dir', '/s', '/a', 'C:\\'
-                ], capture_output=True, text=True, timeout=10, shell=False)
+                cmd = ['cmd', '/c', 'dir', '/s', '/a', 'C:\\']
             else:
                 # Linux/Mac: use find
-                result = subprocess.run([
-                    'find', '/', '-type', 'f', '-ls'
-                ], capture_output=True, text=True, timeout=10)
+                cmd = ['find', '/', '-type', 'f', '-ls']
+            
+            # Read only the bytes we keep, then stop the walk: bounded memory and
+            # no waiting for a full-disk listing. The timer covers a stalled walk.
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, shell=False)
+            watchdog = threading.Timer(FS_METADATA_TIMEOUT, proc.kill)
+            watchdog.start()
+            try:
+                data = proc.stdout.read(FS_METADATA_LIMIT)
+            finally:
+                watchdog.cancel()
+                proc.kill()
+                proc.stdout.close()
+                proc.wait(timeout=1)
             
-            with open(metadata_file, 'w') as f:
-                f.write(result.stdout[:100000])  # Limit to 100KB
+            self._write_evidence(metadata_file, data)
         except Exception as e:
             print(f"   ⚠️  [WARN] Filesystem snapshot failed: {e}")
     
     def _snapshot_process_state(self, snapshot_dir: Path, process_info: Dict):
         """Snapshot current process state"""
         try:
-            import psutil
-            import json
-            
             state_file = snapshot_dir / "process_state.json"
             
-            # Capture all running processes
-            processes = []
-            for proc in psutil.process_iter(['pid', 'name', 'cmdline', 'username', 'create_time']):
-                try:
+            if _OS_TYPE == 'linux':
+                # Direct /proc read: one stat + cmdline per PID, stops at the limit
+                processes = self._collect_linux_processes(MAX_SNAPSHOT_PROCESSES)
+            else:
+                import psutil
+                
+                # Attributes are fetched lazily per process, so stop at the limit;
+                # exited processes are skipped and unreadable fields become None
+                processes = []
+                for proc in psutil.process_iter(['pid', 'name', 'cmdline', 'username', 'create_time'], ad_value=None):
                     processes.append(proc.info)
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    pass
+                    if len(processes) >= MAX_SNAPSHOT_PROCESSES:
+                        break
             
             state = {
                 'timestamp': datetime.now().isoformat(),
                 'trigger_process': process_info,
-                'all_processes': processes[:100],  # Limit to 100 processes
+                'all_processes': processes[:MAX_SNAPSHOT_PROCESSES],
                 'system_info': {
-                    'hostname': platform.node(),
-                    'os': platform.system(),
-                    'version': platform.version()
+                    'hostname': _HOSTNAME,
+                    'os': _OS_NAME,
+                    'version': _OS_VERSION
                 }
             }
             
-            with open(state_file, 'w') as f:
-                json.dump(state, f, indent=2)
+            self._write_evidence(state_file, orjson.dumps(state, default=str, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
         except Exception as e:
             print(f"   ⚠️  [WARN] Process state snapshot failed: {e}")
 
+    def _collect_linux_processes(self, limit: int) -> List[Dict[str, Any]]:
+        """
+        Read up to `limit` processes straight from /proc (Linux only)
+        
+        Columns are gathered in separate lists and zipped once at the end,
+        producing the same keys and values as the psutil path (real UID owner,
+        untruncated name).
+        """
+        import pwd
+        
+        clock_ticks = os.sysconf('SC_CLK_TCK')
+        if self._boot_time is None:
+            with open('/proc/stat', 'rb') as f:
+                for line in f:
+                    if line.startswith(b'btime'):
+                        self._boot_time = int(line.split()[1])
+                        break
+        
+        pids, names, cmdlines, uids, create_times = [], [], [], [], []
+        with os.scandir('/proc') as entries:
+            for entry in entries:
+                if len(pids) >= limit:
+                    break
+                if not entry.name.isdigit():
+                    continue
+                try:
+                    with open(f'/proc/{entry.name}/status', 'rb') as f:
+                        status = f.read()
+                    with open(f'/proc/{entry.name}/stat', 'rb') as f:
+                        stat = f.read()
+                    with open(f'/proc/{entry.name}/cmdline', 'rb') as f:
+                        raw_cmdline = f.read()
+                except OSError:
+                    continue  # Process exited mid-scan
+                
+                # comm is parenthesised and may itself contain spaces or ')'
+                name_start, name_end = stat.find(b'('), stat.rfind(b')')
+                fields = stat[name_end + 2:].split()
+                
+                name = stat[name_start + 1:name_end].decode(errors='replace')
+                cmdline = [arg.decode(errors='replace') for arg in raw_cmdline.split(b'\0') if arg]
+                # The kernel truncates comm to 15 chars; prefer the argv[0] basename it prefixes
+                if len(name) >= 15 and cmdline:
+                    extended_name = os.path.basename(cmdline[0])
+                    if extended_name.startswith(name):
+                        name = extended_name
+                # Uid: real effective saved fs -- the real UID, as psutil.username() uses
+                uid_at = status.find(b'\nUid:')
+                
+                pids.append(int(entry.name))
+                names.append(name)
+                cmdlines.append(cmdline)
+                uids.append(int(status[uid_at + 5:].split(None, 1)[0]))
+                create_times.append((self._boot_time or 0) + int(fields[19]) / clock_ticks)
+        
+        usernames = {}
+        for uid in set(uids):
+            try:
+                usernames[uid] = pwd.getpwuid(uid).pw_name
+            except KeyError:
+                usernames[uid] = str(uid)
+        
+        return [
+            {'pid': pid, 'name': name, 'cmdline': cmdline, 'username': usernames[uid], 'create_time': create_time}
+            for pid, name, cmdline, uid, create_time in zip(pids, names, cmdlines, uids, create_times)
+        ]
+
     def _snapshot_network_state(self, snapshot_dir: Path):
-        """Snapshot current network state"""
+        """
+        Snapshot current network state
+        
+        'family' and 'type' are the raw socket constants; map them back with
+        socket.AddressFamily(value).name / socket.SocketKind(value).name
+        """
         try:
             import psutil
-            import json
             
             network_file = snapshot_dir / "network_state.json"
             
@@ -312,8 +585,8 @@ class EmergencySnapshotEngine:
                 try:
                     connections.append({
                         'fd': conn.fd,
-                        'family': str(conn.family),
-                        'type': str(conn.type),
+                        'family': int(conn.family),
+                        'type': int(conn.type),
                         'laddr': f"{conn.laddr.ip}:{conn.laddr.port}" if conn.laddr else None,
                         'raddr': f"{conn.raddr.ip}:{conn.raddr.port}" if conn.raddr else None,
                         'status': conn.status,
@@ -322,40 +595,134 @@ class EmergencySnapshotEngine:
                 except Exception as e:
                     print(f"   ⚠️  [WARN] Failed to capture connection metadata: {e}")
             
-            with open(network_file, 'w') as f:
-                json.dump(connections, f, indent=2)
+            self._write_evidence(network_file, orjson.dumps(connections, option=orjson.OPT_INDENT_2))
                 
         except Exception as e:
             print(f"   ⚠️  [WARN] Network state snapshot failed: {e}")
     
+    def _write_evidence(self, path: Path, data: bytes):
+        """Stage captured bytes in the snapshot's ring slot, or write through if there is none/it's full"""
+        slot = self._active_slots.get(path.parent)
+        if slot is None or not slot.stage(path, data):
+            self._write_file(path, data)
+    
+    def _write_file(self, path: Path, data: bytes):
+        """Write an evidence file; on Linux it is published atomically, complete or not at all"""
+        if self._atomic_publish:
+            atomic_write(path, data, durable=False)  # fsync per file would blow the capture budget
+            return
+        
+        with open(path, 'wb') as f:
+            f.write(data)
+    
+    def _check_atomic_publish(self):
+        """Publish (twice, to cover replacing) and read back a probe file; disable atomic publish if it fails"""
+        probe = self.snapshots_dir / f".publish_probe_{os.getpid()}"
+        try:
+            for data in (b"probe-1", b"probe-2"):
+                atomic_write(probe, data, durable=False)
+                if probe.read_bytes() != data:
+                    raise OSError("probe read back different bytes")
+        except OSError as e:
+            print(f"   ⚠️  [WARN] Atomic evidence publish failed its self-check ({e}), using direct writes")
+            self._atomic_publish = False
+        finally:
+            try:
+                probe.unlink()
+            except OSError:
+                pass
+    
+    def _flush_loop(self):
+        """Background flusher: drain sealed ring slots to disk and recycle them"""
+        while True:
+            slot = self._flush_queue.get()
+            if slot is None:
+                return  # close(): every slot queued before it has been flushed
+            try:
+                for path, offset, length in slot.entries:
+                    try:
+                        self._write_file(path, slot.arena[offset:offset + length])
+                    except Exception as e:
+                        print(f"   ⚠️  [WARN] Failed to flush {path.name}: {e}")
+            finally:
+                with _pending_lock:
+                    _pending_flushes.pop(slot.snapshot_id, None)
+                flushed = slot.flushed
+                slot.reset()
+                self._free_slots.put(slot)
+                flushed.set()
+    
+    def close(self):
+        """Finish in-flight captures, flush every staged snapshot, then release the pools, flusher and ring arenas"""
+        if self._closed:
+            return
+        self._closed = True
+        atexit.unregister(self.close)
+        self._executor.shutdown(wait=True)
+        self._copy_executor.shutdown(wait=True)
+        
+        # Slots are flushed in queue order, so the sentinel returns once all staged evidence is on disk
+        self._flush_queue.put(None)
+        self._flush_thread.join(timeout=SNAPSHOT_FLUSH_TIMEOUT)
+        if self._flush_thread.is_alive():
+            print("   ⚠️  [WARN] Snapshot flush did not finish before shutdown, some evidence may be missing")
+            return  # the flusher still uses its slots: leave their arenas mapped
+        
+        while True:
+            try:
+                self._free_slots.get_nowait().arena.close()
+            except queue.Empty:
+                break
+    
     def get_snapshot_info(self, snapshot_id: str) -> Dict[str, Any]:
         """Get information about a snapshot"""
+        # Staged evidence must be on disk before it can be measured (only this snapshot's slot)
+        if not wait_for_snapshot(snapshot_id):
+            print(f"   ⚠️  [WARN] Snapshot {snapshot_id} still flushing, size is partial")
+        
         snapshot_dir = self.snapshots_dir / snapshot_id
         
-        if not snapshot_dir.exists():
+        try:
+            created = snapshot_dir.stat().st_ctime
+        except FileNotFoundError:
             return {'error': 'Snapshot not found'}
         
-        # Calculate total size
-        total_size = sum(f.stat().st_size for f in snapshot_dir.rglob('*') if f.is_file())
-        
-        # Count files
-        file_count = len(list(snapshot_dir.rglob('*')))
+        return self._snapshot_info(snapshot_id, str(snapshot_dir), created)
+    
+    def _snapshot_info(self, snapshot_id: str, path: str, created: float) -> Dict[str, Any]:
+        # Single scandir walk: size and entry count together, using DirEntry's cached stat
+        total_size = 0
+        file_count = 0
+        pending = [path]
+        while pending:
+            with os.scandir(pending.pop()) as entries:
+                for entry in entries:
+                    file_count += 1
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        total_size += entry.stat(follow_symlinks=False).st_size
         
         return {
             'snapshot_id': snapshot_id,
-            'path': str(snapshot_dir),
+            'path': path,
             'total_size_bytes': total_size,
             'total_size_mb': total_size / (1024 * 1024),
             'file_count': file_count,
-            'created': datetime.fromtimestamp(snapshot_dir.stat().st_ctime).isoformat()
+            'created': datetime.fromtimestamp(created).isoformat()
         }
     
     def list_snapshots(self) -> List[Dict[str, Any]]:
         """List all emergency snapshots"""
+        with _pending_lock:
+            pending = list(_pending_flushes.values())
+        for flushed in pending:
+            flushed.wait(SNAPSHOT_FLUSH_TIMEOUT)
         snapshots = []
         
-        for snapshot_dir in self.snapshots_dir.iterdir():
-            if snapshot_dir.is_dir() and snapshot_dir.name.startswith('SNAP-'):
-                snapshots.append(self.get_snapshot_info(snapshot_dir.name))
+        with os.scandir(self.snapshots_dir) as entries:
+            for entry in entries:
+                if entry.name.startswith('SNAP-') and entry.is_dir():
+                    snapshots.append(self._snapshot_info(entry.name, entry.path, entry.stat().st_ctime))
         
         return sorted(snapshots, key=lambda x: x['created'], reverse=True)
@@ -3,42 +3,53 @@ Gemini Behavior Analyzer
 Detect anomalous user behavior and automated/bot activity
 """
 
+import asyncio
+import functools
 import google.generativeai as genai
+import hashlib
 import json
+import threading
+import time
+import numpy as np
+import orjson
+from collections import OrderedDict
 from datetime import datetime
 from typing import Dict, Any, List
 
 from utils.model_selector import model_selector
 
+try:
+    from google.api_core import exceptions as google_exceptions
+    # Quota and timeout errors are worth a backoff retry; anything else fails fast
+    TRANSIENT_GEMINI_ERRORS = (google_exceptions.ResourceExhausted, google_exceptions.DeadlineExceeded,
+                               google_exceptions.ServiceUnavailable)
+except ImportError:
+    TRANSIENT_GEMINI_ERRORS = ()
 
-class GeminiBehaviorAnalyzer:
-    """
-    Use Gemini to analyze user behavior patterns and detect anomalies
-    No ML training required - Gemini learns patterns on the fly
-    """
-    
-    def __init__(self, api_key: str, model_name: str = 'gemini-2.5-flash'):
-        genai.configure(api_key=api_key)
-        # Validate model or pick best fast/intelligent one
-        self.model_name = model_selector.validate_model(model_name)
-        self.model = genai.GenerativeModel(self.model_name)
-        self.user_baselines = {}  # Store user behavior baselines
-    
-    def analyze_keystroke_pattern(self, keystroke_timings: List[int]) -> Dict[str, Any]:
-        """
-        Analyze if keystrokes are human or automated
-        
-        Args:
-            keystroke_timings: List of milliseconds between keystrokes
-        
-        Returns:
-            Analysis of input type (human vs bot)
-        """
-        prompt = f"""
-You are analyzing keystroke timing data to detect if input is from a human or automated script/bot.
+# --- Constants ---
+BATCH_CONCURRENCY = 16  # max in-flight Gemini requests per batch (API QPS headroom)
+BOT_CV_THRESHOLD = 0.02    # coefficient of variation below this: mechanical input
+HUMAN_CV_THRESHOLD = 0.4   # coefficient of variation above this: natural human jitter
+HISTOGRAM_BINS_MS = [0, 25, 50, 100, 150, 250, 500, float('inf')]
+RESULT_CACHE_SIZE = 1024   # LRU entries per analysis type
+GEMINI_MAX_RETRIES = 2          # backoff retries per call on quota/timeout errors
+GEMINI_BACKOFF_BASE = 0.5       # seconds, doubled on each retry
+BREAKER_FAILURE_THRESHOLD = 3   # consecutive quota/timeout errors before the breaker opens
+BREAKER_COOLDOWN = 30           # seconds the breaker stays open
+BOT_SCORE_MIN_INTERVALS = 9     # one full byte of rise/fall signature
+BOT_SCORE_HUMAN_MAX = 0.3       # local bot score at or below this: human
+BOT_SCORE_BOT_MIN = 0.7         # local bot score at or above this: bot
+# Packed rise/fall bytes of scripted input: never rising (fixed delay),
+# always rising (steady ramp) and strict two-phase alternation
+BOT_SIGNATURES = np.array([0x00, 0xFF, 0x55, 0xAA], dtype=np.uint8)
 
-KEYSTROKE INTERVALS (milliseconds): {keystroke_timings}
+# --- Prompt Fragments ---
+# Static instruction text is built once at import; each call only joins in the dynamic parts
+_KEYSTROKE_PROMPT_HEAD = """
+You are analyzing keystroke timing data to detect if input is from a human or automated script/bot.
 
+"""
+_KEYSTROKE_PROMPT_TAIL = """
 Human typing characteristics:
 - Variable timing (100-250ms range with variance)
 - Natural rhythm with occasional pauses
@@ -54,55 +65,32 @@ Bot/script characteristics:
 TASK: Determine if this is human or automated input.
 
 Respond in JSON format:
-{{
+{
   "input_type": "human|bot|uncertain",
   "is_human": boolean,
   "confidence": 0.0-1.0,
   "evidence": ["list of specific patterns that support conclusion"],
-  "statistical_summary": {{
-    "mean_interval": number,
-    "std_deviation": number,
-    "min_interval": number,
-    "max_interval": number
-  }},
   "assessment": "Brief explanation"
-}}
+}
 
-Calculate the statistical properties and explain your reasoning.
+The statistics above are exact; do not recompute them. Explain your reasoning.
 IMPORTANT: Respond ONLY with valid JSON.
 """
-        
-        try:
-            response = self.model.generate_content(prompt)
-            result = self._parse_json_response(response.text)
-            result['analysis_timestamp'] = datetime.now().isoformat()
-            return result
-        except Exception as e:
-            return self._error_response(f"Keystroke analysis failed: {str(e)}")
-    
-    def analyze_user_activity_sequence(self, user_id: str, recent_activities: List[Dict]) -> Dict[str, Any]:
-        """
-        Detect if user's current activities match their normal behavior
-        
-        Args:
-            user_id: User identifier
-            recent_activities: List of recent user activities
-        
-        Returns:
-            Anomaly detection result
-        """
-        baseline = self.user_baselines.get(user_id, "No baseline available")
-        
-        prompt = f"""
+_HISTOGRAM_BINS_LABEL = str(HISTOGRAM_BINS_MS[:-1])
+
+_USER_ACTIVITY_PROMPT_HEAD = """
 You are analyzing user activity for anomalous behavior that might indicate account compromise or malicious insider.
 
-USER ID: {user_id}
+USER ID: """
+_USER_ACTIVITY_PROMPT_BASELINE = """
 
 NORMAL BASELINE BEHAVIOR:
-{baseline}
+"""
+_USER_ACTIVITY_PROMPT_ACTIVITIES = """
 
 RECENT ACTIVITIES (last 30 minutes):
-{json.dumps(recent_activities, indent=2)}
+"""
+_USER_ACTIVITY_PROMPT_TAIL = """
 
 TASK: Determine if recent activities are consistent with this user's normal behavior.
 
@@ -115,7 +103,7 @@ Consider:
 6. Volume and velocity of activities
 
 Respond in JSON:
-{{
+{
   "anomaly_detected": true/false,
   "confidence": 0.0-1.0,
   "anomalous_activities": ["list specific unusual activities"],
@@ -124,38 +112,20 @@ Respond in JSON:
   "recommended_action": "immediate_investigation|monitor_closely|no_action",
   "reasoning": "Explain why this is/isn't anomalous",
   "risk_score": 0-100
-}}
+}
 
 IMPORTANT: Respond ONLY with valid JSON.
 """
-        
-        try:
-            response = self.model.generate_content(prompt)
-            result = self._parse_json_response(response.text)
-            result['user_id'] = user_id
-            result['analysis_timestamp'] = datetime.now().isoformat()
-            return result
-        except Exception as e:
-            return self._error_response(f"User activity analysis failed: {str(e)}")
-    
-    def build_user_baseline(self, user_id: str, historical_activities: List[Dict]) -> str:
-        """
-        Let Gemini create a behavioral baseline for a user
-        
-        Args:
-            user_id: User identifier
-            historical_activities: Historical activity data
-        
-        Returns:
-            Baseline profile text
-        """
-        prompt = f"""
+
+_BASELINE_PROMPT_HEAD = """
 Analyze this user's historical activity and create a behavioral baseline profile.
 
-USER ID: {user_id}
+USER ID: """
+_BASELINE_PROMPT_ACTIVITIES = """
 
 HISTORICAL ACTIVITIES (past 30 days):
-{json.dumps(historical_activities[:100], indent=2)}
+"""
+_BASELINE_PROMPT_TAIL = """
 
 TASK: Create a behavioral profile summarizing:
 1. Normal working hours
@@ -169,33 +139,13 @@ TASK: Create a behavioral profile summarizing:
 Provide a concise baseline profile (200-300 words) that can be used to detect future anomalies.
 Focus on patterns, not individual events.
 """
-        
-        try:
-            response = self.model.generate_content(prompt)
-            baseline = response.text.strip()
-            
-            # Store baseline
-            self.user_baselines[user_id] = baseline
-            
-            return baseline
-        except Exception as e:
-            return f"Failed to build baseline: {str(e)}"
-    
-    def analyze_command_sequence(self, command_sequence: List[str]) -> Dict[str, Any]:
-        """
-        Analyze sequence of commands for attack patterns
-        
-        Args:
-            command_sequence: List of commands in chronological order
-        
-        Returns:
-            Analysis of command sequence
-        """
-        prompt = f"""
+
+_COMMAND_SEQUENCE_PROMPT_HEAD = """
 Analyze this sequence of commands for attack patterns.
 
 COMMAND SEQUENCE:
-{json.dumps(command_sequence, indent=2)}
+"""
+_COMMAND_SEQUENCE_PROMPT_TAIL = """
 
 TASK: Identify if this sequence represents an attack pattern.
 
@@ -209,7 +159,7 @@ Look for:
 7. Ransomware preparation (shadow copy deletion, backup deletion)
 
 Respond in JSON:
-{{
+{
   "is_attack_sequence": true/false,
   "confidence": 0.0-1.0,
   "attack_phase": "reconnaissance|initial_access|execution|persistence|privilege_escalation|defense_evasion|credential_access|discovery|lateral_movement|collection|exfiltration|impact",
@@ -218,39 +168,448 @@ Respond in JSON:
   "next_likely_steps": ["predicted next attacker actions"],
   "mitre_attack_ttps": ["T1078", "T1003"],
   "recommended_response": "immediate_containment|monitor|investigate"
-}}
+}
 
 IMPORTANT: Respond ONLY with valid JSON.
 """
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling Gemini while the circuit breaker is open"""
+
+
+def _gemini_call(error_format: str, text_result: bool = False):
+    """
+    Wrap an analyze method that calls Gemini: retry quota/timeout errors with
+    exponential backoff and turn any failure into the method's error result
+    
+    Args:
+        error_format: Message template, '{}' receives the exception text
+        text_result: Return the message as a plain string instead of an error dict
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            attempt = 0
+            while True:
+                try:
+                    return method(self, *args, **kwargs)
+                except Exception as e:
+                    if self._should_retry(e, attempt):
+                        time.sleep(GEMINI_BACKOFF_BASE * 2 ** attempt)
+                        attempt += 1
+                        continue
+                    message = error_format.format(str(e))
+                    return message if text_result else self._error_response(message)
+        return wrapper
+    return decorator
+
+
+class GeminiBehaviorAnalyzer:
+    """
+    Use Gemini to analyze user behavior patterns and detect anomalies
+    No ML training required - Gemini learns patterns on the fly
+    """
+    
+    def __init__(self, api_key: str, model_name: str = 'gemini-2.5-flash', warm_up: bool = True):
+        genai.configure(api_key=api_key)
+        # Validate model or pick best fast/intelligent one
+        self.model_name = model_selector.validate_model(model_name)
+        self.model = genai.GenerativeModel(self.model_name)
+        self.user_baselines = {}  # Store user behavior baselines
+        
+        # LRU memo of Gemini verdicts: repeated sequences/timing profiles skip the API
+        self._seq_cache: OrderedDict = OrderedDict()
+        self._keystroke_cache: OrderedDict = OrderedDict()
+        self._cache_lock = threading.Lock()
         
+        # Circuit breaker: stop calling Gemini for a while after repeated quota/timeout errors
+        self._consecutive_failures = 0
+        self._breaker_open_until = 0.0
+        self._breaker_lock = threading.Lock()
+        
+        # Pay channel setup + TLS handshake now rather than on the first real threat
+        if warm_up:
+            threading.Thread(target=self._warm_up, daemon=True, name="gemini-warmup").start()
+    
+    def _warm_up(self):
+        """Open the Gemini connection with a 1-token request; failures surface on real calls"""
         try:
-            response = self.model.generate_content(prompt)
-            result = self._parse_json_response(response.text)
-            result['analysis_timestamp'] = datetime.now().isoformat()
-            result['command_count'] = len(command_sequence)
+            self.model.generate_content("ping", generation_config={'max_output_tokens': 1})
+        except Exception:
+            pass
+    
+    @_gemini_call("Keystroke analysis failed: {}")
+    def analyze_keystroke_pattern(self, keystroke_timings: List[int]) -> Dict[str, Any]:
+        """
+        Analyze if keystrokes are human or automated
+        
+        Args:
+            keystroke_timings: List of milliseconds between keystrokes
+        
+        Returns:
+            Analysis of input type (human vs bot)
+        """
+        stats = self._keystroke_stats(keystroke_timings)
+        
+        # Clear-cut cases are decided locally without an API round-trip
+        local_result = self._local_keystroke_verdict(stats)
+        if local_result:
+            return local_result
+        
+        cache_key = self._keystroke_cache_key(stats)
+        cached = self._cache_get(self._keystroke_cache, cache_key)
+        if cached:
+            return cached
+        
+        prompt = self._keystroke_prompt(stats)
+        response = self._generate(prompt)
+        return self._cache_put(self._keystroke_cache, cache_key, self._keystroke_result(response.text, stats))
+    
+    def _keystroke_stats(self, keystroke_timings: List[int]) -> Dict[str, Any]:
+        """Summary statistics of the inter-key intervals (computed in NumPy)"""
+        arr = np.asarray(keystroke_timings, dtype=np.float32)
+        if arr.size == 0:
+            return {'count': 0, 'cv': None}
+        
+        mean = float(arr.mean())
+        std = float(arr.std(ddof=1)) if arr.size > 1 else 0.0
+        p10, p50, p90 = (float(v) for v in np.percentile(arr, [10, 50, 90]))
+        histogram, _ = np.histogram(arr, bins=HISTOGRAM_BINS_MS)
+        
+        bot_score = self._local_bot_score(arr) if arr.size >= BOT_SCORE_MIN_INTERVALS else None
+        
+        return {
+            'count': int(arr.size),
+            'mean_interval': round(mean, 2),
+            'std_deviation': round(std, 2),
+            'min_interval': float(arr.min()),
+            'max_interval': float(arr.max()),
+            'cv': round(std / mean, 4) if arr.size > 1 and mean > 0 else None,
+            'percentiles': {'p10': p10, 'p50': p50, 'p90': p90},
+            'histogram': histogram.tolist(),
+            'bot_score': round(bot_score, 3) if bot_score is not None else None
+        }
+    
+    def _local_bot_score(self, arr: np.ndarray) -> float:
+        """
+        Score how mechanical a timing stream is, without branching per interval
+        
+        Args:
+            arr: Inter-key intervals in milliseconds
+        
+        Returns:
+            0.0 (human jitter) to 1.0 (scripted input)
+        """
+        mean = arr.mean()
+        # Successive-difference jitter: small for fixed delays even when they drift slowly
+        jitter = np.diff(arr).std() / mean if mean > 0 else 0.0
+        regularity = float(np.clip(1.0 - jitter / HUMAN_CV_THRESHOLD, 0.0, 1.0))
+        
+        # Lag-1 autocorrelation is undefined (NaN) for a constant stream, which is perfectly regular
+        with np.errstate(invalid='ignore', divide='ignore'):
+            autocorr = np.corrcoef(arr[:-1], arr[1:])[0, 1]
+        periodicity = abs(float(np.nan_to_num(autocorr, nan=1.0)))
+        
+        rises = (arr[1:] > arr[:-1]).astype(np.uint8)
+        fingerprint = np.packbits(rises[:rises.size - rises.size % 8])
+        signature = float(np.isin(fingerprint, BOT_SIGNATURES).mean())
+        
+        return max(regularity, (periodicity + signature) / 2)
+    
+    def _local_keystroke_verdict(self, stats: Dict[str, Any]) -> Dict[str, Any]:
+        """Return a verdict when the bot score or coefficient of variation is unambiguous, else None"""
+        score, cv = stats.get('bot_score'), stats['cv']
+        if score is not None and not BOT_SCORE_HUMAN_MAX < score < BOT_SCORE_BOT_MIN:
+            is_human = score <= BOT_SCORE_HUMAN_MAX
+            confidence = round(0.5 + abs(score - 0.5), 2)
+            evidence = [f"Local bot score {score:.2f} (interval jitter, lag-1 autocorrelation, "
+                        f"rise/fall signature) is {'at or below' if is_human else 'at or above'} "
+                        f"{BOT_SCORE_HUMAN_MAX if is_human else BOT_SCORE_BOT_MIN}"]
+        elif cv is not None and not BOT_CV_THRESHOLD <= cv <= HUMAN_CV_THRESHOLD:
+            is_human = cv > HUMAN_CV_THRESHOLD
+            confidence = 0.95
+            evidence = [f"Coefficient of variation {cv:.3f} is "
+                        f"{'above' if is_human else 'below'} the "
+                        f"{HUMAN_CV_THRESHOLD if is_human else BOT_CV_THRESHOLD} threshold"]
+        else:
+            return None
+        
+        return {
+            'input_type': 'human' if is_human else 'bot',
+            'is_human': is_human,
+            'confidence': confidence,
+            'evidence': evidence,
+            'statistical_summary': self._statistical_summary(stats),
+            'assessment': 'Natural timing jitter consistent with human typing' if is_human
+                          else 'Mechanically regular timing consistent with scripted input',
+            'decided_locally': True,
+            'analysis_timestamp': datetime.now().isoformat()
+        }
+    
+    def _statistical_summary(self, stats: Dict[str, Any]) -> Dict[str, Any]:
+        return {key: stats.get(key) for key in ('mean_interval', 'std_deviation', 'min_interval', 'max_interval')}
+    
+    def _keystroke_prompt(self, stats: Dict[str, Any]) -> str:
+        percentiles = stats.get('percentiles', {})
+        return ''.join([
+            _KEYSTROKE_PROMPT_HEAD,
+            f"KEYSTROKE INTERVAL STATISTICS (milliseconds, pre-computed over {stats['count']} intervals):\n"
+            f"- Mean: {stats.get('mean_interval')}\n"
+            f"- Standard deviation: {stats.get('std_deviation')}\n"
+            f"- Coefficient of variation: {stats.get('cv')}\n"
+            f"- Min / Max: {stats.get('min_interval')} / {stats.get('max_interval')}\n"
+            f"- 10th / 50th / 90th percentile: {percentiles.get('p10')} / {percentiles.get('p50')} / {percentiles.get('p90')}\n"
+            f"- Histogram (bins {_HISTOGRAM_BINS_LABEL} ms and up): {stats.get('histogram')}\n",
+            _KEYSTROKE_PROMPT_TAIL
+        ])
+    
+    def _keystroke_result(self, response_text: str, stats: Dict[str, Any]) -> Dict[str, Any]:
+        result = self._parse_json_response(response_text)
+        result['statistical_summary'] = self._statistical_summary(stats)
+        result['analysis_timestamp'] = datetime.now().isoformat()
+        return result
+    
+    @_gemini_call("User activity analysis failed: {}")
+    def analyze_user_activity_sequence(self, user_id: str, recent_activities: List[Dict]) -> Dict[str, Any]:
+        """
+        Detect if user's current activities match their normal behavior
+        
+        Args:
+            user_id: User identifier
+            recent_activities: List of recent user activities
+        
+        Returns:
+            Anomaly detection result
+        """
+        prompt = self._user_activity_prompt(user_id, recent_activities)
+        response = self._generate(prompt)
+        return self._user_activity_result(response.text, user_id)
+    
+    def _user_activity_prompt(self, user_id: str, recent_activities: List[Dict]) -> str:
+        baseline = self.user_baselines.get(user_id, "No baseline available")
+        
+        return ''.join([
+            _USER_ACTIVITY_PROMPT_HEAD, str(user_id),
+            _USER_ACTIVITY_PROMPT_BASELINE, str(baseline),
+            _USER_ACTIVITY_PROMPT_ACTIVITIES, json.dumps(recent_activities, indent=2),
+            _USER_ACTIVITY_PROMPT_TAIL
+        ])
+    
+    def _user_activity_result(self, response_text: str, user_id: str) -> Dict[str, Any]:
+        result = self._parse_json_response(response_text)
+        result['user_id'] = user_id
+        result['analysis_timestamp'] = datetime.now().isoformat()
+        return result
+    
+    @_gemini_call("Failed to build baseline: {}", text_result=True)
+    def build_user_baseline(self, user_id: str, historical_activities: List[Dict]) -> str:
+        """
+        Let Gemini create a behavioral baseline for a user
+        
+        Args:
+            user_id: User identifier
+            historical_activities: Historical activity data
+        
+        Returns:
+            Baseline profile text
+        """
+        prompt = ''.join([
+            _BASELINE_PROMPT_HEAD, str(user_id),
+            _BASELINE_PROMPT_ACTIVITIES, json.dumps(historical_activities[:100], indent=2),
+            _BASELINE_PROMPT_TAIL
+        ])
+        
+        response = self._generate(prompt)
+        baseline = response.text.strip()
+        
+        # Store baseline
+        self.user_baselines[user_id] = baseline
+        
+        return baseline
+    
+    @_gemini_call("Command sequence analysis failed: {}")
+    def analyze_command_sequence(self, command_sequence: List[str]) -> Dict[str, Any]:
+        """
+        Analyze sequence of commands for attack patterns
+        
+        Args:
+            command_sequence: List of commands in chronological order
+        
+        Returns:
+            Analysis of command sequence
+        """
+        cache_key = self._sequence_cache_key(command_sequence)
+        cached = self._cache_get(self._seq_cache, cache_key)
+        if cached:
+            return cached
+        
+        prompt = self._command_sequence_prompt(command_sequence)
+        response = self._generate(prompt)
+        return self._cache_put(self._seq_cache, cache_key, self._command_sequence_result(response.text, command_sequence))
+    
+    def _command_sequence_prompt(self, command_sequence: List[str]) -> str:
+        return ''.join([_COMMAND_SEQUENCE_PROMPT_HEAD, json.dumps(command_sequence, indent=2), _COMMAND_SEQUENCE_PROMPT_TAIL])
+    
+    def _command_sequence_result(self, response_text: str, command_sequence: List[str]) -> Dict[str, Any]:
+        result = self._parse_json_response(response_text)
+        result['analysis_timestamp'] = datetime.now().isoformat()
+        result['command_count'] = len(command_sequence)
+        return result
+    
+    def analyze_keystroke_patterns_batch(self, timing_sets: List[List[int]]) -> List[Dict[str, Any]]:
+        """Analyze several keystroke streams in one concurrent flight"""
+        return self._run_batch([
+            {'type': 'keystroke', 'keystroke_timings': timings} for timings in timing_sets
+        ])
+    
+    def analyze_user_activity_sequences_batch(self, activity_sets: Dict[str, List[Dict]]) -> List[Dict[str, Any]]:
+        """Analyze several users' recent activity in one concurrent flight"""
+        return self._run_batch([
+            {'type': 'user_activity', 'user_id': user_id, 'recent_activities': activities}
+            for user_id, activities in activity_sets.items()
+        ])
+    
+    def analyze_command_sequences_batch(self, command_sequences: List[List[str]]) -> List[Dict[str, Any]]:
+        """Analyze several command sequences in one concurrent flight"""
+        return self._run_batch([
+            {'type': 'command_sequence', 'command_sequence': sequence} for sequence in command_sequences
+        ])
+    
+    def _run_batch(self, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if not requests:
+            return []
+        return asyncio.run(self.analyze_batch(requests))
+    
+    async def analyze_batch(self, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Run several analyses concurrently over the async Gemini client
+        
+        Args:
+            requests: List of dicts with a 'type' ('keystroke', 'user_activity',
+                      'command_sequence') plus that analysis' arguments
+        
+        Returns:
+            Results in the same order as requests
+        """
+        semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+        return await asyncio.gather(*[self._analyze_async(request, semaphore) for request in requests])
+    
+    async def _analyze_async(self, request: Dict[str, Any], semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+        kind = request.get('type')
+        if kind == 'keystroke':
+            label = "Keystroke analysis"
+            stats = self._keystroke_stats(request['keystroke_timings'])
+            local_result = self._local_keystroke_verdict(stats)
+            if local_result:
+                return local_result
+            cache, cache_key = self._keystroke_cache, self._keystroke_cache_key(stats)
+            prompt = self._keystroke_prompt(stats)
+            finish = lambda text: self._keystroke_result(text, stats)
+        elif kind == 'user_activity':
+            label = "User activity analysis"
+            cache, cache_key = None, None
+            prompt = self._user_activity_prompt(request['user_id'], request['recent_activities'])
+            finish = lambda text: self._user_activity_result(text, request['user_id'])
+        elif kind == 'command_sequence':
+            label = "Command sequence analysis"
+            cache, cache_key = self._seq_cache, self._sequence_cache_key(request['command_sequence'])
+            prompt = self._command_sequence_prompt(request['command_sequence'])
+            finish = lambda text: self._command_sequence_result(text, request['command_sequence'])
+        else:
+            return self._error_response(f"Unknown analysis type: {kind}")
+        
+        if cache is not None:
+            cached = self._cache_get(cache, cache_key)
+            if cached:
+                return cached
+        
+        attempt = 0
+        while True:
+            try:
+                async with semaphore:
+                    response = await self._generate_async(prompt)
+                result = finish(response.text)
+                return self._cache_put(cache, cache_key, result) if cache is not None else result
+            except Exception as e:
+                if self._should_retry(e, attempt):
+                    await asyncio.sleep(GEMINI_BACKOFF_BASE * 2 ** attempt)
+                    attempt += 1
+                    continue
+                return self._error_response(f"{label} failed: {str(e)}")
+    
+    def _generate(self, prompt: str):
+        self._check_breaker()
+        response = self.model.generate_content(prompt)
+        self._consecutive_failures = 0
+        return response
+    
+    async def _generate_async(self, prompt: str):
+        self._check_breaker()
+        response = await self.model.generate_content_async(prompt)
+        self._consecutive_failures = 0
+        return response
+    
+    def _check_breaker(self):
+        remaining = self._breaker_open_until - time.time()
+        if remaining > 0:
+            raise CircuitOpenError(f"Gemini circuit breaker open, retrying in {remaining:.0f}s")
+    
+    def _should_retry(self, error: Exception, attempt: int) -> bool:
+        """Record a failed Gemini call; True if it is transient and worth another attempt"""
+        if not isinstance(error, TRANSIENT_GEMINI_ERRORS):
+            return False
+        with self._breaker_lock:
+            self._consecutive_failures += 1
+            if self._consecutive_failures >= BREAKER_FAILURE_THRESHOLD:
+                self._breaker_open_until = time.time() + BREAKER_COOLDOWN
+                self._consecutive_failures = 0
+                print(f"   ⚠️  [WARN] Gemini throttled; pausing behavior analysis calls for {BREAKER_COOLDOWN}s")
+                return False
+        return attempt < GEMINI_MAX_RETRIES
+    
+    def _sequence_cache_key(self, command_sequence: List[str]) -> str:
+        return hashlib.blake2b(json.dumps(command_sequence).encode(), digest_size=16).hexdigest()
+    
+    def _keystroke_cache_key(self, stats: Dict[str, Any]) -> tuple:
+        # Quantized so near-identical timing profiles share a verdict
+        return (stats['count'], round(stats.get('mean_interval') or 0), round(stats.get('std_deviation') or 0),
+                round(stats['cv'] or 0, 2))
+    
+    def _cache_get(self, cache: OrderedDict, key) -> Dict[str, Any]:
+        with self._cache_lock:
+            result = cache.get(key)
+            if result is None:
+                return None
+            cache.move_to_end(key)
+        return dict(result)
+    
+    def _cache_put(self, cache: OrderedDict, key, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Store a successful result (errors are never cached) and return it"""
+        if 'error' in result:
             return result
-        except Exception as e:
-            return self._error_response(f"Command sequence analysis failed: {str(e)}")
+        with self._cache_lock:
+            cache[key] = dict(result)
+            cache.move_to_end(key)
+            if len(cache) > RESULT_CACHE_SIZE:
+                cache.popitem(last=False)
+        return result
     
     def _parse_json_response(self, response_text: str) -> Dict[str, Any]:
         """Parse JSON from Gemini response"""
-        response_text = response_text.strip()
-        
-        if response_text.startswith('```json'):
-            response_text = response_text[7:]
-        if response_text.startswith('```'):
-            response_text = response_text[3:]
-        if response_text.endswith('```'):
-            response_text = response_text[:-3]
-        
-        response_text = response_text.strip()
+        # Slice from the first '{' to the last '}': drops ```json fences and any
+        # surrounding prose in one pass, without intermediate strip/slice copies
+        buf = response_text.encode()
+        start, end = buf.find(b'{'), buf.rfind(b'}') + 1
         
         try:
-            return json.loads(response_text)
-        except json.JSONDecodeError:
+            if start == -1 or end <= start:
+                raise orjson.JSONDecodeError("No JSON object found", response_text, 0)
+            return orjson.loads(buf[start:end])
+        except orjson.JSONDecodeError:
             return {
                 'error': 'JSON parsing failed',
-                'raw_response': response_text[:500]
+                'raw_response': response_text.strip()[:500]
             }
     
     def _error_response(self, error_message: str) -> Dict[str, Any]:
@@ -42,7 +42,7 @@ class GeminiCommandAnalyzer:
             Analysis result with threat assessment
         """
         from utils.command_decoder import CommandDecoder, command_history
-        from prompts.enhanced_prompts import IMPROVED_COMMAND_ANALYSIS_PROMPT
+        from prompts.enhanced_prompts import render_command_analysis_prompt
         from datetime import datetime
         
         # Decode if obfuscated
@@ -59,7 +59,7 @@ class GeminiCommandAnalyzer:
         command_history.add_command(user, command_line, process_info)
         
         # Build enhanced prompt with all context
-        prompt = IMPROVED_COMMAND_ANALYSIS_PROMPT.format(
+        prompt = render_command_analysis_prompt(
             command_line=decoded_command,
             process_name=process_info.get('name', 'Unknown'),
             pid=process_info.get('pid', 'N/A'),
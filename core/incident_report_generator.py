@@ -3,111 +3,55 @@ Incident Report Generator
 Creates detailed forensic reports from captured evidence
 """
 
+import hashlib
+import io
 import os
-import json
 import shutil
+import string
+import zipfile
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 
+import orjson
+
+from core.emergency_snapshot import wait_for_snapshot
+from utils.evidence_vault import EvidenceVault
+
+# --- Constants ---
+ARCHIVE_CHUNK_SIZE = 1024 * 1024  # bytes per read when streaming snapshot files into the archive
+
+
+def _json_default(obj: Any) -> Any:
+    """Serialize the non-native types found in incident data (orjson handles datetime itself)"""
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    return str(obj)
+
+
+def _dumps(obj: Any) -> bytes:
+    """Indented JSON bytes for incident files"""
+    return orjson.dumps(obj, default=_json_default, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
 
-class IncidentReportGenerator:
-    """
-    Generates comprehensive incident reports with evidence analysis
-    """
-    
-    def __init__(self, evidence_path: str = "./evidence"):
-        self.evidence_path = Path(evidence_path)
-        self.reports_dir = self.evidence_path / "reports"
-        self.incidents_dir = self.evidence_path / "incidents"
-        
-        # Create directories
-        self.reports_dir.mkdir(parents=True, exist_ok=True)
-        self.incidents_dir.mkdir(parents=True, exist_ok=True)
-    
-    def generate_incident_report(self, incident_data: Dict[str, Any]) -> str:
-        """
-        Generate a comprehensive incident report
-        
-        Args:
-            incident_data: Dictionary containing:
-                - incident_id: Unique incident identifier
-                - threat_type: Type of threat detected
-                - command: Malicious command executed
-                - process_info: Process metadata
-                - snapshot_id: Evidence snapshot ID
-                - detection_time: When threat was detected
-                - ai_analysis: AI analysis results
-                - severity: Threat severity level
-        
-        Returns:
-            Path to generated report
-        """
-        incident_id = incident_data.get('incident_id', f"INC-{datetime.now().strftime('%Y%m%d-%H%M%S')}")
-        
-        # Create incident directory
-        incident_dir = self.incidents_dir / incident_id
-        incident_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Generate report content
-        report_content = self._build_report_content(incident_data)
-        
-        # Save report locally in incident folder
-        report_file = incident_dir / "INCIDENT_REPORT.md"
-        with open(report_file, 'w', encoding='utf-8') as f:
-            f.write(report_content)
-        
-        # ALSO save to central reports repository via EvidenceVault
-        try:
-            from utils.evidence_vault import EvidenceVault
-            vault = EvidenceVault(str(self.evidence_path))
-            vault.save_report(incident_id, report_content, report_type="forensic")
-            
-            # NEW: Package and preserve raw evidence snapshot as artifact
-            snapshot_id = incident_data.get('snapshot_id')
-            if snapshot_id:
-                snapshot_dir = self.evidence_path / "emergency_snapshots" / snapshot_id
-                if snapshot_dir.exists():
-                     # Create temporary zip archive
-                     archive_base = incident_dir / "RAW_EVIDENCE_SNAPSHOT"
-                     archive_path = shutil.make_archive(str(archive_base), 'zip', str(snapshot_dir))
-                     
-                     # Preserve in vault as artifact (This populates evidence/artifacts AND chain_of_evidence_trail.json)
-                     vault.preserve_file_artifact(incident_id, archive_path, artifact_type="snapshot_archive")
-                     print(f"   📦 Evidence Artifact Preserved: {Path(archive_path).name}")
-        except Exception as e:
-            print(f"⚠️ Failed to save to central reports vault: {e}")
-        
-        # Save JSON metadata
-        metadata_file = incident_dir / "incident_metadata.json"
-        with open(metadata_file, 'w', encoding='utf-8') as f:
-            json.dump(incident_data, f, indent=2, default=str)
-        
-        # Create evidence index
-        self._create_evidence_index(incident_dir, incident_data)
-        
-        print(f"\n📄 Incident Report Generated:")
-        print(f"   Report: {report_file}")
-        print(f"   Incident ID: {incident_id}")
-        
-        return str(report_file)
-    
-    def _build_report_content(self, incident_data: Dict[str, Any]) -> str:
-        """Build the markdown report content"""
-        
-        incident_id = incident_data.get('incident_id', 'UNKNOWN')
-        threat_type = incident_data.get('threat_type', 'Unknown Threat')
-        command = incident_data.get('command', 'N/A')
-        process_info = incident_data.get('process_info', {})
-        snapshot_id = incident_data.get('snapshot_id', 'N/A')
-        detection_time = incident_data.get('detection_time', datetime.now().isoformat())
-        ai_analysis = incident_data.get('ai_analysis', {})
-        severity = incident_data.get('severity', 'UNKNOWN')
-        
-        # Build report
-        report = f"""# 🚨 INCIDENT REPORT: {incident_id}
 
-**Generated**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}  
+def _iter_files(path: str):
+    """Yield os.DirEntry for every non-directory under path, each directory's files before its subdirectories"""
+    with os.scandir(path) as it:
+        entries = list(it)
+    subdirs = []
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            subdirs.append(entry.path)
+        else:
+            yield entry
+    for subdir in subdirs:
+        yield from _iter_files(subdir)
+
+
+# Markdown report body, parsed once at import and filled per incident with str.format_map
+_REPORT_TEMPLATE = """# 🚨 INCIDENT REPORT: {incident_id}
+
+**Generated**: {generated}  
 **Status**: ACTIVE THREAT DETECTED  
 **Severity**: {severity}
 
@@ -116,7 +60,7 @@ class IncidentReportGenerator:
 ## 📊 EXECUTIVE SUMMARY
 
 ### Incident Overview
-A **{threat_type.replace('_', ' ').title()}** attack was detected and neutralized by ShadowNet Nexus.
+A **{threat_type_pretty}** attack was detected and neutralized by ShadowNet Nexus.
 
 **What Happened:**
 - Attacker attempted to execute anti-forensics command
@@ -135,7 +79,7 @@ A **{threat_type.replace('_', ' ').title()}** attack was detected and neutralize
 ## 🎯 THREAT DETAILS
 
 ### Attack Classification
-- **Threat Type**: {threat_type.replace('_', ' ').title()}
+- **Threat Type**: {threat_type_pretty}
 - **Severity Level**: {severity}
 - **Detection Time**: {detection_time}
 - **Evidence ID**: {snapshot_id}
@@ -146,27 +90,27 @@ A **{threat_type.replace('_', ' ').title()}** attack was detected and neutralize
 ```
 
 ### Process Information
-- **Process Name**: {process_info.get('name', 'Unknown')}
-- **Process ID (PID)**: {process_info.get('pid', 'N/A')}
-- **User Account**: {process_info.get('user', 'Unknown')}
-- **Parent Process**: {process_info.get('parent_name', 'Unknown')}
-- **Execution Time**: {process_info.get('timestamp', 'N/A')}
-- **Elevated Privileges**: {'Yes' if process_info.get('elevated') else 'No'}
+- **Process Name**: {process_name}
+- **Process ID (PID)**: {process_pid}
+- **User Account**: {process_user}
+- **Parent Process**: {parent_name}
+- **Execution Time**: {process_timestamp}
+- **Elevated Privileges**: {elevated}
 
 ---
 
 ## 🤖 AI ANALYSIS
 
 ### Threat Assessment
-{self._format_ai_analysis(ai_analysis)}
+{ai_section}
 
 ### Confidence Level
-- **Detection Confidence**: {ai_analysis.get('confidence', 0):.1%}
-- **Threat Actor Attribution**: {ai_analysis.get('likely_threat_actor', 'Unknown')}
-- **Attack Category**: {ai_analysis.get('category', 'Unknown')}
+- **Detection Confidence**: {confidence_pct}
+- **Threat Actor Attribution**: {threat_actor}
+- **Attack Category**: {category}
 
 ### Behavioral Indicators
-{self._format_indicators(ai_analysis.get('indicators', []))}
+{indicators_section}
 
 ---
 
@@ -178,7 +122,7 @@ A **{threat_type.replace('_', ' ').title()}** attack was detected and neutralize
 - **Evidence Location**: `evidence/emergency_snapshots/{snapshot_id}/`
 
 ### Evidence Types Preserved
-{self._format_evidence_types(incident_data.get('evidence_types', []))}
+{evidence_types_section}
 
 ### Chain of Evidence Trail
 - **Captured By**: ShadowNet Nexus Proactive Evidence Collector
@@ -192,14 +136,14 @@ A **{threat_type.replace('_', ' ').title()}** attack was detected and neutralize
 
 ### Attack Sequence Reconstructed
 
-1. **Initial Access** (Timestamp: {process_info.get('timestamp', 'N/A')})
-   - Process `{process_info.get('name', 'Unknown')}` spawned
-   - Parent: `{process_info.get('parent_name', 'Unknown')}`
-   - User: `{process_info.get('user', 'Unknown')}`
+1. **Initial Access** (Timestamp: {process_timestamp})
+   - Process `{process_name}` spawned
+   - Parent: `{parent_name}`
+   - User: `{process_user}`
 
 2. **Anti-Forensics Attempt** (Timestamp: {detection_time})
    - Command: `{command}`
-   - Intent: {threat_type.replace('_', ' ').title()}
+   - Intent: {threat_type_pretty}
    - **ShadowNet Detection**: ✅ CAUGHT IN REAL-TIME
 
 3. **Evidence Preservation** (Timestamp: {detection_time})
@@ -272,7 +216,7 @@ cat network_state.json | jq .
 
 ## 🎯 THREAT ACTOR PROFILE
 
-{self._format_threat_actor_profile(ai_analysis)}
+{threat_actor_profile}
 
 ---
 
@@ -315,8 +259,254 @@ This incident demonstrates the effectiveness of proactive evidence preservation.
 
 *This report is automatically generated and contains forensically sound evidence suitable for legal proceedings.*
 """
+
+# (literal, field, format_spec, conversion) runs: reports are emitted piecewise, never as one big string
+_REPORT_TEMPLATE_PARTS = tuple(string.Formatter().parse(_REPORT_TEMPLATE))
+
+
+class _HashingWriter(io.RawIOBase):
+    """
+    Write-through file wrapper that SHA-256 hashes every byte written
+    Reports itself unseekable, so zipfile streams sequentially and never rewrites headers
+    """
+    
+    def __init__(self, raw):
+        self._raw = raw
+        self._hash = hashlib.sha256()
+        self._pos = 0
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, data) -> int:
+        self._hash.update(data)
+        written = self._raw.write(data)
+        self._pos += written
+        return written
+    
+    def tell(self) -> int:
+        return self._pos
+    
+    def flush(self):
+        self._raw.flush()
+    
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+
+class IncidentReportGenerator:
+    """
+    Generates comprehensive incident reports with evidence analysis
+    """
+    
+    # Report sections that are identical across incidents, built once
+    _DEFAULT_EVIDENCE_TYPES_MD = "\n".join(f"- ✅ {etype}" for etype in (
+        "Event Logs (Application, System, Security)",
+        "Process State (All running processes)",
+        "Network Connections (Active TCP/UDP)",
+        "Volume Shadow Copy State",
+        "File System Metadata"
+    ))
+    _THREAT_ACTOR_PROFILE_MD = """**Primary Attribution**: {actor}
+
+**Known TTPs**:
+- Uses anti-forensics techniques to evade detection
+- Targets event logs and backup systems
+- Employs obfuscation and evasion tactics
+
+**Confidence**: {confidence:.1%}
+"""
+    
+    def __init__(self, evidence_path: str = "./evidence", append_jsonl: bool = False):
+        """
+        Args:
+            evidence_path: Root of the evidence tree
+            append_jsonl: Also append every report's incident data to the incident's
+                          events.jsonl, keeping the history of repeated reports
+        """
+        self.evidence_path = Path(evidence_path)
+        self.append_jsonl = append_jsonl
+        self.reports_dir = self.evidence_path / "reports"
+        self.incidents_dir = self.evidence_path / "incidents"
         
-        return report
+        # Directories are created on the first report, not at construction
+        self._dirs_ready = False
+        self._vault: Optional[EvidenceVault] = None
+    
+    @property
+    def vault(self) -> EvidenceVault:
+        """Central evidence vault, created on first use and shared by every report"""
+        if self._vault is None:
+            self._vault = EvidenceVault(str(self.evidence_path))
+        return self._vault
+    
+    def generate_incident_report(self, incident_data: Dict[str, Any]) -> str:
+        """
+        Generate a comprehensive incident report
+        
+        Args:
+            incident_data: Dictionary containing:
+                - incident_id: Unique incident identifier
+                - threat_type: Type of threat detected
+                - command: Malicious command executed
+                - process_info: Process metadata
+                - snapshot_id: Evidence snapshot ID
+                - detection_time: When threat was detected
+                - ai_analysis: AI analysis results
+                - severity: Threat severity level
+        
+        Returns:
+            Path to generated report
+        """
+        # One clock read per report: every timestamp it prints agrees
+        now = datetime.now()
+        incident_id = incident_data.get('incident_id', f"INC-{now.strftime('%Y%m%d-%H%M%S')}")
+        
+        if not self._dirs_ready:
+            self.reports_dir.mkdir(parents=True, exist_ok=True)
+            self.incidents_dir.mkdir(parents=True, exist_ok=True)
+            self._dirs_ready = True
+        
+        # The snapshot's ring slot must be on disk before it is archived and indexed
+        snapshot_id = incident_data.get('snapshot_id')
+        if snapshot_id and not wait_for_snapshot(snapshot_id):
+            print(f"⚠️ Snapshot {snapshot_id} still flushing, its archive may be incomplete")
+        
+        # Create incident directory
+        incident_dir = self.incidents_dir / incident_id
+        incident_dir.mkdir(parents=True, exist_ok=True)
+        
+        # Generate report content (as ordered chunks, streamed to each destination)
+        report_parts = self._render_report_parts(incident_data, now)
+        
+        # Save report locally in incident folder
+        report_file = incident_dir / "INCIDENT_REPORT.md"
+        with open(report_file, 'w', encoding='utf-8') as f:
+            f.writelines(report_parts)
+        
+        # ALSO save to central reports repository via EvidenceVault
+        try:
+            # The report and the snapshot artifact share one chain-of-evidence trail rewrite
+            with self.vault.batch() as vault:
+                vault.save_report(incident_id, report_parts, report_type="forensic")
+                
+                # NEW: Package and preserve raw evidence snapshot as artifact
+                if snapshot_id:
+                    snapshot_dir = self.evidence_path / "emergency_snapshots" / snapshot_id
+                    try:
+                        with os.scandir(snapshot_dir) as it:
+                            entries = list(it)
+                    except FileNotFoundError:
+                        entries = []
+                    
+                    if len(entries) == 1 and entries[0].is_file():
+                        # Single-file snapshot: preserve the file itself, no archive needed
+                        vault.preserve_file_artifact(incident_id, entries[0].path, artifact_type="snapshot_file")
+                        print(f"   📦 Evidence Artifact Preserved: {entries[0].name}")
+                    elif entries:
+                        # Stored (uncompressed) zip, hashed as it is written so the vault needn't re-read it
+                        archive_path = incident_dir / "RAW_EVIDENCE_SNAPSHOT.zip"
+                        archive_hash = self._archive_snapshot(snapshot_dir, archive_path)
+                        
+                        # Preserve in vault as artifact (This populates evidence/artifacts AND chain_of_evidence_trail.jsonl)
+                        vault.preserve_file_artifact(incident_id, str(archive_path), artifact_type="snapshot_archive",
+                                                     sha256=archive_hash)
+                        print(f"   📦 Evidence Artifact Preserved: {archive_path.name}")
+        except Exception as e:
+            print(f"⚠️ Failed to save to central reports vault: {e}")
+        
+        # Save JSON metadata
+        metadata_file = incident_dir / "incident_metadata.json"
+        metadata_file.write_bytes(_dumps(incident_data))
+        if self.append_jsonl:
+            self._append_event(incident_dir, incident_data)
+        
+        # Create evidence index
+        self._create_evidence_index(incident_dir, incident_data)
+        
+        print(f"\n📄 Incident Report Generated:")
+        print(f"   Report: {report_file}")
+        print(f"   Incident ID: {incident_id}")
+        
+        return str(report_file)
+    
+    def _archive_snapshot(self, snapshot_dir: Path, archive_path: Path) -> str:
+        """
+        Zip a snapshot directory (ZIP_STORED) in one streaming pass
+        
+        Args:
+            snapshot_dir: Snapshot directory to archive
+            archive_path: Destination .zip file
+        
+        Returns:
+            SHA-256 hex digest of the archive bytes
+        """
+        with open(archive_path, 'wb') as raw:
+            out = _HashingWriter(raw)
+            with zipfile.ZipFile(out, 'w', compression=zipfile.ZIP_STORED, allowZip64=True) as zf:
+                for entry in _iter_files(snapshot_dir):
+                    arcname = os.path.relpath(entry.path, snapshot_dir)
+                    zinfo = zipfile.ZipInfo.from_file(entry.path, arcname)
+                    with open(entry.path, 'rb') as src, zf.open(zinfo, 'w') as dst:
+                        shutil.copyfileobj(src, dst, ARCHIVE_CHUNK_SIZE)
+        return out.hexdigest()
+    
+    def _append_event(self, incident_dir: Path, incident_data: Dict[str, Any]):
+        """Append one compact JSON line to the incident's events.jsonl (never rewrites earlier events)"""
+        line = orjson.dumps(incident_data, default=_json_default,
+                            option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS)
+        with open(incident_dir / "events.jsonl", 'ab') as f:
+            f.write(line)
+    
+    def _build_report_content(self, incident_data: Dict[str, Any]) -> str:
+        """Build the markdown report content"""
+        return "".join(self._render_report_parts(incident_data, datetime.now()))
+    
+    def _render_report_parts(self, incident_data: Dict[str, Any], now: datetime) -> List[str]:
+        """Render the markdown report as ordered chunks (template literals and filled fields)"""
+        
+        incident_id = incident_data.get('incident_id', 'UNKNOWN')
+        threat_type = incident_data.get('threat_type', 'Unknown Threat')
+        command = incident_data.get('command', 'N/A')
+        process_info = incident_data.get('process_info', {})
+        snapshot_id = incident_data.get('snapshot_id', 'N/A')
+        detection_time = incident_data['detection_time'] if 'detection_time' in incident_data else now.isoformat()
+        ai_analysis = incident_data.get('ai_analysis', {})
+        severity = incident_data.get('severity', 'UNKNOWN')
+        
+        # Values used by more than one section are looked up once
+        confidence = ai_analysis.get('confidence', 0)
+        actor = ai_analysis.get('likely_threat_actor', 'Unknown')
+        
+        subs = {
+            'incident_id': incident_id,
+            'generated': now.strftime('%Y-%m-%d %H:%M:%S'),
+            'severity': severity,
+            'threat_type_pretty': threat_type.replace('_', ' ').title(),
+            'detection_time': detection_time,
+            'snapshot_id': snapshot_id,
+            'command': command,
+            'process_name': process_info.get('name', 'Unknown'),
+            'process_pid': process_info.get('pid', 'N/A'),
+            'process_user': process_info.get('user', 'Unknown'),
+            'parent_name': process_info.get('parent_name', 'Unknown'),
+            'process_timestamp': process_info.get('timestamp', 'N/A'),
+            'elevated': 'Yes' if process_info.get('elevated') else 'No',
+            'ai_section': self._format_ai_analysis(ai_analysis),
+            'confidence_pct': f"{confidence:.1%}",
+            'threat_actor': actor,
+            'category': ai_analysis.get('category', 'Unknown'),
+            'indicators_section': self._format_indicators(ai_analysis.get('indicators', [])),
+            'evidence_types_section': self._format_evidence_types(incident_data.get('evidence_types', [])),
+            'threat_actor_profile': self._format_threat_actor_profile(actor, confidence),
+        }
+        
+        parts = []
+        for literal, field, format_spec, _ in _REPORT_TEMPLATE_PARTS:
+            parts.append(literal)
+            if field is not None:
+                parts.append(format(subs[field], format_spec))
+        return parts
     
     def _format_ai_analysis(self, ai_analysis: Dict[str, Any]) -> str:
         """Format AI analysis section"""
@@ -336,32 +526,16 @@ This incident demonstrates the effectiveness of proactive evidence preservation.
     def _format_evidence_types(self, evidence_types: List[str]) -> str:
         """Format evidence types list"""
         if not evidence_types:
-            evidence_types = [
-                "Event Logs (Application, System, Security)",
-                "Process State (All running processes)",
-                "Network Connections (Active TCP/UDP)",
-                "Volume Shadow Copy State",
-                "File System Metadata"
-            ]
+            return self._DEFAULT_EVIDENCE_TYPES_MD
         
         return "\n".join([f"- ✅ {etype}" for etype in evidence_types])
     
-    def _format_threat_actor_profile(self, ai_analysis: Dict[str, Any]) -> str:
+    def _format_threat_actor_profile(self, actor: str, confidence: float) -> str:
         """Format threat actor profile"""
-        actor = ai_analysis.get('likely_threat_actor', 'Unknown')
-        
         if actor == 'Unknown':
             return "**Attribution**: Insufficient data for threat actor attribution"
         
-        return f"""**Primary Attribution**: {actor}
-
-**Known TTPs**:
-- Uses anti-forensics techniques to evade detection
-- Targets event logs and backup systems
-- Employs obfuscation and evasion tactics
-
-**Confidence**: {ai_analysis.get('confidence', 0):.1%}
-"""
+        return self._THREAT_ACTOR_PROFILE_MD.format(actor=actor, confidence=confidence)
     
     def _create_evidence_index(self, incident_dir: Path, incident_data: Dict[str, Any]):
         """Create an index of all evidence files"""
@@ -378,18 +552,19 @@ This incident demonstrates the effectiveness of proactive evidence preservation.
         # Create evidence index
         index_file = incident_dir / "EVIDENCE_INDEX.txt"
         
+        lines = [
+            f"EVIDENCE INDEX - {incident_data.get('incident_id')}\n",
+            "=" * 60 + "\n\n",
+            f"Snapshot Location: {snapshot_path}\n",
+            f"Snapshot ID: {snapshot_id}\n\n",
+            "Files:\n",
+            "-" * 60 + "\n"
+        ]
+        
+        # List all files in snapshot
+        for entry in _iter_files(snapshot_path):
+            rel_path = os.path.relpath(entry.path, snapshot_path)
+            lines.append(f"  {rel_path} ({entry.stat(follow_symlinks=False).st_size:,} bytes)\n")
+        
         with open(index_file, 'w', encoding='utf-8') as f:
-            f.write(f"EVIDENCE INDEX - {incident_data.get('incident_id')}\n")
-            f.write("=" * 60 + "\n\n")
-            f.write(f"Snapshot Location: {snapshot_path}\n")
-            f.write(f"Snapshot ID: {snapshot_id}\n\n")
-            f.write("Files:\n")
-            f.write("-" * 60 + "\n")
-            
-            # List all files in snapshot
-            for root, dirs, files in os.walk(snapshot_path):
-                for file in files:
-                    file_path = Path(root) / file
-                    rel_path = file_path.relative_to(snapshot_path)
-                    size = file_path.stat().st_size
-                    f.write(f"  {rel_path} ({size:,} bytes)\n")
+            f.write("".join(lines))
@@ -4,12 +4,16 @@ Captures evidence BEFORE anti-forensics commands execute
 Cross-platform support with automatic OS detection
 """
 
+import functools
+import logging
+import re
 import time
 import threading
 from datetime import datetime
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from pathlib import Path
 
+from utils.command_decoder import CommandDecoder
 from utils.os_detector import os_detector
 
 # Bug 3 Fix: single conditional import — removed the unconditional top-level
@@ -22,6 +26,26 @@ except ImportError as e:
     HAS_DEPENDENCIES = False
     print(f"⚠️  [WARN] Missing dependencies in ProactiveEvidenceCollector: {e}")
 
+try:
+    import ahocorasick
+    HAS_AHOCORASICK = True
+except ImportError:
+    HAS_AHOCORASICK = False
+
+logger = logging.getLogger(__name__)
+
+# Obfuscation upgrades severity one level; unknown severities land on CRITICAL
+_SEV_IDX = {'LOW': 0, 'MEDIUM': 1, 'HIGH': 2, 'CRITICAL': 3}
+_SEV_ORDER = ('LOW', 'MEDIUM', 'HIGH', 'CRITICAL', 'CRITICAL')
+DECODE_CACHE_SIZE = 1024
+
+
+@functools.lru_cache(maxsize=DECODE_CACHE_SIZE)
+def _decode(command: str) -> Tuple[str, Tuple[str, ...]]:
+    """CommandDecoder.decode_if_encoded, memoized: scripts re-run the same commands"""
+    decoded_command, techniques = CommandDecoder.decode_if_encoded(command)
+    return decoded_command, tuple(techniques)
+
 
 class ProactiveEvidenceCollector:
     """
@@ -56,6 +80,9 @@ class ProactiveEvidenceCollector:
         
         # Threat type mapping - NOW DYNAMIC FROM CONFIG
         self.threat_patterns = self._build_threat_patterns()
+        self._pattern_items = tuple(self.threat_patterns.items())
+        self._matcher = self._compile_matcher()
+        self._pattern_re = self._compile_regex() if self._matcher is None else None
         
         # Statistics
         self.snapshots_taken = 0
@@ -72,12 +99,14 @@ class ProactiveEvidenceCollector:
         print(f"   📋 Monitoring {len(self.threat_patterns)} threat patterns from config.yaml")
     
     def _build_threat_patterns(self) -> Dict[str, Dict[str, Any]]:
-        """Build threat patterns dynamically from config.yaml keywords"""
+        """Build threat patterns dynamically from config.yaml keywords (keyed by lowercased keyword)"""
         patterns = {}
         
         # Automatically create patterns for ALL keywords from config
         for keyword in self.suspicious_keywords:
             keyword_lower = keyword.lower()
+            if keyword_lower in patterns:
+                continue  # case-variant duplicate: the first one configured wins
             
             # Classify threat type based on keyword
             if any(x in keyword_lower for x in ['wevtutil', 'clear-eventlog', 'log', 'history', 'journal']):
@@ -115,7 +144,7 @@ class ProactiveEvidenceCollector:
                 threat_type = 'suspicious_activity'
                 severity = 'MEDIUM'
             
-            patterns[keyword] = {
+            patterns[keyword_lower] = {
                 'threat_type': threat_type,
                 'severity': severity,
                 'description': f'Suspicious keyword detected: {keyword}'
@@ -123,6 +152,50 @@ class ProactiveEvidenceCollector:
         
         return patterns
     
+    def _compile_matcher(self):
+        """Compile all threat patterns into one Aho-Corasick automaton (None without pyahocorasick)"""
+        if not HAS_AHOCORASICK or not self.threat_patterns:
+            return None
+        
+        automaton = ahocorasick.Automaton()
+        for index, (pattern, _) in enumerate(self._pattern_items):
+            if pattern:
+                # Insertion index keeps the loop's priority: earliest configured pattern wins
+                automaton.add_word(pattern, index)
+        automaton.make_automaton()
+        return automaton
+    
+    def _compile_regex(self):
+        """Fallback matcher without pyahocorasick: all patterns in one compiled alternation"""
+        patterns = [pattern for pattern, _ in self._pattern_items if pattern]
+        if not patterns:
+            return None
+        self._pattern_index = {pattern: index for index, (pattern, _) in enumerate(self._pattern_items)}
+        return re.compile('|'.join(map(re.escape, patterns)))
+    
+    def _match_pattern(self, cmd_lower: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Return the highest-priority (pattern, threat_info) contained in the command, if any"""
+        if self._matcher is not None:
+            best = min((index for _, index in self._matcher.iter(cmd_lower)), default=None)
+            return self._pattern_items[best] if best is not None else None
+        
+        if self._pattern_re is not None:
+            # One C-level scan rejects the common no-match case; on a hit only the
+            # patterns configured before it can still take priority
+            hit = self._pattern_re.search(cmd_lower)
+            if hit is None:
+                return None
+            index = self._pattern_index[hit.group(0)]
+            for item in self._pattern_items[:index]:
+                if item[0] in cmd_lower:
+                    return item
+            return self._pattern_items[index]
+        
+        for item in self._pattern_items:
+            if item[0] in cmd_lower:
+                return item
+        return None
+    
     def should_capture(self, command: str) -> Optional[Dict[str, Any]]:
         """
         Determine if command requires proactive evidence capture
@@ -134,34 +207,33 @@ class ProactiveEvidenceCollector:
             Threat info if capture needed, None otherwise
         """
         if not self.enabled:
-            print(f"   ⚠️  Proactive capture DISABLED")
+            logger.debug("Proactive capture disabled")
             return None
         
         # Decode command if obfuscated (Base64, etc.)
-        from utils.command_decoder import CommandDecoder
-        decoded_command, obfuscation_techniques = CommandDecoder.decode_if_encoded(command)
+        decoded_command, obfuscation_techniques = _decode(command)
         
         # Check both original and decoded command
         commands_to_check = [command.lower(), decoded_command.lower()]
         
-        print(f"   🔍 Checking if proactive capture needed...")
-        print(f"   Command: {command[:100]}...")
+        logger.debug("Checking if proactive capture needed: %.100s", command)
         
         for cmd_to_check in commands_to_check:
-            for pattern, threat_info in self.threat_patterns.items():
-                if pattern.lower() in cmd_to_check:
-                    print(f"   ✅ MATCH! Pattern: '{pattern}' found in command")
-                    
-                    # If obfuscation was detected, increase severity
-                    if obfuscation_techniques and threat_info['severity'] != 'CRITICAL':
-                        threat_info = threat_info.copy()
-                        threat_info['description'] += f" (Obfuscated: {', '.join(obfuscation_techniques)})"
-                        # Upgrade severity if obfuscated
-                        severity_upgrade = {'LOW': 'MEDIUM', 'MEDIUM': 'HIGH', 'HIGH': 'CRITICAL'}
-                        threat_info['severity'] = severity_upgrade.get(threat_info['severity'], 'CRITICAL')
-                    return threat_info
+            match = self._match_pattern(cmd_to_check)
+            if match is not None:
+                pattern, threat_info = match
+                logger.debug("Proactive capture pattern '%s' found in command", pattern)
+                
+                # If obfuscation was detected, increase severity
+                if obfuscation_techniques and threat_info['severity'] != 'CRITICAL':
+                    threat_info = {
+                        **threat_info,
+                        'severity': _SEV_ORDER[_SEV_IDX.get(threat_info['severity'], 3) + 1],
+                        'description': f"{threat_info['description']} (Obfuscated: {', '.join(obfuscation_techniques)})"
+                    }
+                return threat_info
         
-        print(f"   ⏸️  No proactive capture pattern matched")
+        logger.debug("No proactive capture pattern matched")
         return None
     
     def capture_threat_context(self, threat_type: str, details: Dict[str, Any]) -> Optional[str]:
@@ -300,6 +372,10 @@ class ProactiveEvidenceCollector:
             'threat_patterns_count': len(self.threat_patterns)
         }
     
+    def close(self):
+        """Flush staged snapshots to disk and stop the snapshot engine (call on shutdown)"""
+        self.snapshot_engine.close()
+    
     def list_preserved_evidence(self) -> list:
         """List all proactively preserved evidence"""
         return self.snapshot_engine.list_snapshots()
@@ -1,33 +1,77 @@
 """
 ShadowNet Nexus - Cross-Platform Process Monitor
-Supports Windows (WMI + Polling), Linux (Polling), and Mac (Polling)
+Supports Windows (WMI + Polling), Linux (Netlink + Polling), and Mac (Polling)
 """
 
+import errno
+import functools
+import logging
+import multiprocessing
 import os
+import queue
 import sys
+import socket
+import struct
 import threading
 import time
-from datetime import datetime
-from typing import Callable, Optional, Dict, Any, List
-from collections import deque
+from collections import OrderedDict
+from typing import Callable, Optional, Dict, Any, Iterator, List
 import platform
-import subprocess
 import ctypes
 
 # --- Constants (Bug 14) ---
-WMI_TIMEOUT_MS = 500       # Improved stability (Bug 5)
-POLLING_INTERVAL = 0.01    # 10ms (Windows fallback)
-UNIX_POLLING_INTERVAL = 0.005 # 5ms (Unix primary)
-WMI_PULSE_INTERVAL = 20    # seconds
+WMI_TIMEOUT_MS = 2000      # Blocking wait per watcher call; bounds stop latency (Bug 5)
+POLL_INTERVAL_MIN = 0.001  # 1ms under heavy process churn
+POLL_INTERVAL_MAX = 0.1    # 100ms when no new PIDs are appearing
+POLL_CHURN_ALPHA = 0.1     # EWMA weight of the latest tick's new-PID count
+POLL_CHURN_GAIN = 100      # ~10ms at one new PID per 10 ticks
+WMI_DRAIN_BATCH = 8        # extra queued events taken per wake-up (timeout 0)
+WMI_SILENCE_LIMIT = 60     # seconds without any WMI event before checking whether processes started unseen
 MAX_HISTORY = 100
+OWNER_CACHE_SIZE = 256
 WMI_DELAY_SECS = 1
+WMI_HEARTBEAT_TIMEOUT = 3 * WMI_TIMEOUT_MS / 1000  # seconds without a WMI loop pass before polling takes over
+NTQUERY_INITIAL_BUFSIZE = 256 * 1024
+SYSTEM_PROCESS_INFORMATION_CLASS = 5
+STATUS_INFO_LENGTH_MISMATCH = 0xC0000004
+NETLINK_RECV_TIMEOUT = 0.5 # seconds; bounds how long stop_monitoring waits
+NETLINK_RECV_BUFSIZE = 4096
+NETLINK_SOCKET_RCVBUF = 4 * 1024 * 1024  # kernel-side queue for exec bursts
+# Run polling in a spawned child process so its scanning doesn't share our GIL. Spawn re-imports the
+# launching script in the child, so that script must keep its startup under `if __name__ == "__main__":`
+# (shadownet_realtime.py does, in main())
+POLL_IN_SUBPROCESS = True
+# Image names whose danger is in their arguments: start-trace events for these get a command-line lookup
+# even when the name itself matches no keyword (first words of multi-word keywords are added at runtime).
+# Every other process's arguments are scanned by the polling loop, which runs alongside start-trace
+WMI_ARGUMENT_HOSTS = frozenset({
+    'cmd', 'powershell', 'pwsh', 'powershell_ise', 'wscript', 'cscript', 'rundll32', 'msiexec',
+    'python', 'pythonw', 'bash', 'wsl', 'sh', 'forfiles', 'installutil', 'msbuild',
+})
+POLL_RELAY_TIMEOUT = 0.5   # seconds; bounds how long stop_monitoring waits on the relay
+SUBSTRING_CODEGEN_LIMIT = 500  # keywords beyond this fall back to a plain any() loop
+REPORTED_DEDUP_WINDOW_NS = 5_000_000_000  # same (pid, name) from two sources within this is one detection
+REPORTED_MAX = 4096        # recently reported processes remembered for that check (FIFO)
+
+# Linux proc connector (linux/connector.h, linux/cn_proc.h)
+NETLINK_CONNECTOR = 11
+CN_IDX_PROC = 1
+CN_VAL_PROC = 1
+NLMSG_DONE = 3
+PROC_CN_MCAST_LISTEN = 1
+PROC_EVENT_EXEC = 0x00000002
+_NLMSGHDR = struct.Struct("=IHHII")     # len, type, flags, seq, pid
+_CN_MSG = struct.Struct("=IIIIHH")      # idx, val, seq, ack, len, flags
+_PROC_EVENT = struct.Struct("=IIQ")     # what, cpu, timestamp_ns
+_EXEC_EVENT = struct.Struct("=II")      # process_pid, process_tgid
+logger = logging.getLogger(__name__)
 
 def is_admin():
     try:
         if platform.system().lower() == 'windows':
             return ctypes.windll.shell32.IsUserAnAdmin()
         return os.getuid() == 0
-    except:
+    except (AttributeError, OSError):
         return False
 
 # Conditional imports
@@ -47,55 +91,541 @@ try:
 except ImportError:
     HAS_WMI = False
 
+try:
+    if platform.system().lower() == 'windows':
+        import win32api
+        import win32con
+        import win32security
+        HAS_WIN32SECURITY = True
+    else:
+        HAS_WIN32SECURITY = False
+except ImportError:
+    HAS_WIN32SECURITY = False
+
+try:
+    import ahocorasick
+    HAS_AHOCORASICK = True
+except ImportError:
+    HAS_AHOCORASICK = False
+
+try:
+    import hyperscan
+    HAS_HYPERSCAN = True
+except ImportError:
+    HAS_HYPERSCAN = False
+
+try:
+    import pwd
+except ImportError:
+    pwd = None
+
+try:
+    _ntdll = ctypes.WinDLL('ntdll') if platform.system().lower() == 'windows' else None
+except (OSError, AttributeError):
+    _ntdll = None
+HAS_NTQUERY = _ntdll is not None
+
+HAS_PROCFS = platform.system().lower() == 'linux' and os.path.isdir('/proc/self')
+PROC_READ_SIZE = 4096
+PID_MAX_LIMIT = 4194304    # Linux hard ceiling (64-bit); Darwin PIDs stay below 100000
+
+
+def _read_proc_file(path: str) -> bytes:
+    """Read a whole /proc file with raw os.read calls (no buffered file object)"""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        chunks = []
+        while True:
+            chunk = os.read(fd, PROC_READ_SIZE)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        return b"".join(chunks)
+    finally:
+        os.close(fd)
+
+
+# Per-event diagnostics go through a queue to one writer thread, keeping the stdout
+# lock and flush syscalls off the detection threads; SHADOWNET_QUIET drops them entirely
+_QUIET = os.environ.get('SHADOWNET_QUIET', '').lower() in ('1', 'true', 'yes')
+_LOG_Q = queue.SimpleQueue()
+
+
+def _log_writer():
+    """Write queued diagnostics, coalescing whatever has piled up into one write"""
+    while True:
+        parts = [_LOG_Q.get()]
+        while True:
+            try:
+                parts.append(_LOG_Q.get_nowait())
+            except queue.Empty:
+                break
+        sys.stdout.write("".join(parts))
+        sys.stdout.flush()
+
+
+if _QUIET:
+    _log_event = lambda msg: None
+else:
+    _log_event = _LOG_Q.put_nowait
+    threading.Thread(target=_log_writer, name="process-monitor-log", daemon=True).start()
+
+
+_ts_cache = (None, "")  # (epoch second, its local ISO prefix)
+
+
+def _iso_from_ns(ns: int) -> str:
+    """ISO-8601 local timestamp for time.time_ns(); strftime runs once per distinct second"""
+    global _ts_cache
+    sec, frac = divmod(ns, 1_000_000_000)
+    cached_sec, prefix = _ts_cache
+    if sec != cached_sec:
+        prefix = time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(sec))
+        _ts_cache = (sec, prefix)
+    return f"{prefix}.{frac // 1000:06d}"
+
+
+def _hs_stop_on_match(pattern_id, start, end, flags, found):
+    """Hyperscan match callback: record the hit and stop scanning"""
+    found.append(pattern_id)
+    return True
+
+
+class _UNICODE_STRING(ctypes.Structure):
+    _fields_ = [
+        ('Length', ctypes.c_ushort),
+        ('MaximumLength', ctypes.c_ushort),
+        ('Buffer', ctypes.c_void_p),
+    ]
+
+
+class _SYSTEM_PROCESS_INFORMATION(ctypes.Structure):
+    """Leading fields of SYSTEM_PROCESS_INFORMATION (winternl.h); ctypes supplies the x86/x64 padding"""
+    _fields_ = [
+        ('NextEntryOffset', ctypes.c_uint32),
+        ('NumberOfThreads', ctypes.c_uint32),
+        ('WorkingSetPrivateSize', ctypes.c_longlong),
+        ('HardFaultCount', ctypes.c_uint32),
+        ('NumberOfThreadsHighWatermark', ctypes.c_uint32),
+        ('CycleTime', ctypes.c_ulonglong),
+        ('CreateTime', ctypes.c_longlong),
+        ('UserTime', ctypes.c_longlong),
+        ('KernelTime', ctypes.c_longlong),
+        ('ImageName', _UNICODE_STRING),
+        ('BasePriority', ctypes.c_int32),
+        ('UniqueProcessId', ctypes.c_void_p),
+        ('InheritedFromUniqueProcessId', ctypes.c_void_p),
+    ]
+
+
+_ntquery_bufsize = NTQUERY_INITIAL_BUFSIZE
+
+
+def _windows_process_snapshot() -> Optional[Dict[int, tuple]]:
+    """
+    All processes in one NtQuerySystemInformation(SystemProcessInformation) call
+    
+    Returns:
+        {pid: (image_name, parent_pid)}, or None if the call is unavailable/fails
+    """
+    global _ntquery_bufsize
+    if not HAS_NTQUERY:
+        return None
+    
+    returned = ctypes.c_uint32(0)
+    while True:
+        buf = ctypes.create_string_buffer(_ntquery_bufsize)
+        status = _ntdll.NtQuerySystemInformation(
+            SYSTEM_PROCESS_INFORMATION_CLASS, buf, _ntquery_bufsize, ctypes.byref(returned)
+        ) & 0xFFFFFFFF
+        if status != STATUS_INFO_LENGTH_MISMATCH:
+            break
+        # Process list grew: retry with headroom, and keep the larger size for later ticks
+        _ntquery_bufsize = max(_ntquery_bufsize * 2, returned.value + NTQUERY_INITIAL_BUFSIZE)
+    if status != 0:
+        return None
+    
+    snapshot = {}
+    base = ctypes.addressof(buf)
+    offset = 0
+    while True:
+        info = _SYSTEM_PROCESS_INFORMATION.from_address(base + offset)
+        pid = info.UniqueProcessId or 0
+        image = info.ImageName
+        if image.Buffer and image.Length:
+            name = ctypes.wstring_at(image.Buffer, image.Length // 2)
+        else:
+            name = "System Idle Process" if pid == 0 else ""
+        snapshot[pid] = (name, info.InheritedFromUniqueProcessId or 0)
+        if not info.NextEntryOffset:
+            break
+        offset += info.NextEntryOffset
+    return snapshot
+
+
+@functools.lru_cache(maxsize=OWNER_CACHE_SIZE)
+def _account_for_sid(sid_string: str) -> str:
+    """DOMAIN\\user for a SID string (LsaLookupSids round-trip, cached per SID)"""
+    sid = win32security.ConvertStringSidToSid(sid_string)
+    user, domain, _ = win32security.LookupAccountSid(None, sid)
+    return f"{domain}\\{user}"
+
+
+def _pid_bitset_size() -> int:
+    """Bytes needed for a one-bit-per-PID set covering every possible PID"""
+    pid_max = PID_MAX_LIMIT
+    if HAS_PROCFS:
+        try:
+            with open('/proc/sys/kernel/pid_max') as f:
+                pid_max = int(f.read())
+        except (OSError, ValueError):
+            pass
+    return (pid_max >> 3) + 1
+
+
+def _iter_pids() -> Iterator[int]:
+    """Current PIDs, streamed from /proc dirents on Linux (no list built); psutil elsewhere"""
+    if not HAS_PROCFS:
+        yield from psutil.pids()
+        return
+    with os.scandir('/proc') as entries:
+        for entry in entries:
+            name = entry.name
+            if name.isdigit():
+                yield int(name)
+
+
+def _read_proc_cmdline(pid: int) -> List[str]:
+    """Argument list from /proc/<pid>/cmdline (same splitting rules as psutil)"""
+    data = os.fsdecode(_read_proc_file(f"/proc/{pid}/cmdline"))
+    if not data:
+        return []
+    # setproctitle()-style rewrites may use spaces instead of NULs
+    sep = '\x00' if data.endswith('\x00') else ' '
+    if data.endswith(sep):
+        data = data[:-1]
+    cmdline = data.split(sep)
+    if sep == '\x00' and len(cmdline) == 1 and ' ' in data:
+        cmdline = data.split(' ')
+    return cmdline
+
+
+def _read_proc_status(pid: int, cmdline: List[str]) -> Dict[str, Any]:
+    """Name, owner and parent PID from a single read of /proc/<pid>/status"""
+    name, ppid, uid = "", None, None
+    for line in _read_proc_file(f"/proc/{pid}/status").split(b"\n"):
+        key, _, value = line.partition(b":")
+        if key == b"Name":
+            name = os.fsdecode(value.strip())
+        elif key == b"PPid":
+            ppid = int(value)
+        elif key == b"Uid":
+            uid = int(value.split()[0])  # real UID, as psutil.username() uses (uids().real)
+    # The kernel truncates names to 15 chars; prefer the argv[0] basename it prefixes
+    if len(name) >= 15 and cmdline:
+        extended_name = os.path.basename(cmdline[0])
+        if extended_name.startswith(name):
+            name = extended_name
+    username = str(uid)
+    if pwd is not None and uid is not None:
+        try:
+            username = pwd.getpwuid(uid).pw_name
+        except KeyError:
+            pass
+    return {'name': name, 'username': username, 'parent_pid': ppid}
+
+
+def _polling_worker(monitor_cls, keywords: List[str], stop_event, hits):
+    """Child-process entry point: run a monitor's polling loop, streaming detections to the parent"""
+    monitor = monitor_cls(None, keywords)
+    monitor.monitoring = True
+    monitor._stop = stop_event
+    monitor._handle_suspicious_command = lambda command, info, method: hits.put((command, info, method))
+    monitor._polling_loop()
+
 
 class BaseProcessMonitor:
     """Base class for platform-specific process monitors"""
     def __init__(self, callback: Optional[Callable] = None, suspicious_keywords: List[str] = None):
         self.callback = callback
         self.suspicious_keywords = suspicious_keywords or []
+        self._suspicious_lower = tuple(kw.lower() for kw in self.suspicious_keywords)
         self.monitoring = False
+        self._stop = threading.Event()  # set by stop_monitoring; doubles as a cancellable sleep
+        self._polling_stop = threading.Event()  # stops polling alone, e.g. once WMI events resume
         self.processes_detected = 0
         self.suspicious_detected = 0
-        self.command_history = deque(maxlen=MAX_HISTORY)
+        # (pid, name) -> time_ns last reported; WMI + backup polling or a netlink catch-up
+        # sweep can see the same process, and each report would re-run the callback
+        self._reported: "OrderedDict[tuple, int]" = OrderedDict()
+        self._reported_lock = threading.Lock()
+        self._active_methods = set()  # detection sources currently running, for get_statistics
+        self._methods_lock = threading.Lock()  # monitor threads add/discard while get_statistics reads
+        # Ring buffer of (detected_ns, command, process_info, method); formatted on read
+        self._hist: List[Optional[tuple]] = [None] * MAX_HISTORY
+        self._hist_idx = 0
         self.os_type = platform.system().lower()
+        self._keyword_matcher = self._compile_keyword_matcher()
+        self._hs_db = self._compile_hyperscan_db() if self._keyword_matcher is None else None
+        self._hs_local = threading.local()  # Hyperscan scratch space is per scanning thread
+        self._substring_match = (self._compile_substring_matcher()
+                                 if self._keyword_matcher is None and self._hs_db is None else None)
+        # Caseless Hyperscan matching is ASCII-only; with ASCII keywords it replaces str.lower()
+        self._hs_caseless = self._hs_db is not None and all(kw.isascii() for kw in self._suspicious_lower)
+        # Multi-word keywords (e.g. "bash -i") can straddle argv elements
+        self._has_phrase_keywords = any(' ' in kw or '\t' in kw for kw in self._suspicious_lower)
+        
+        # Detections are handed to a dispatcher thread so slow callbacks never stall the monitor loop
+        self._event_q = queue.SimpleQueue()
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name="process-monitor-dispatch", daemon=True)
+        self._dispatcher.start()
+        
+        if not any(self._suspicious_lower):
+            # Nothing can match: specialise the checks away entirely
+            self._is_suspicious = lambda command: False
+            self._is_suspicious_lower = lambda cmd_lower: False
+            self._any_suspicious_in_list = lambda parts: False
+
+    def _compile_keyword_matcher(self):
+        """Compile suspicious keywords into one Aho-Corasick automaton (None without pyahocorasick)"""
+        keywords = [kw for kw in self._suspicious_lower if kw]
+        if not HAS_AHOCORASICK or not keywords:
+            return None
+        automaton = ahocorasick.Automaton()
+        for keyword in keywords:
+            automaton.add_word(keyword, keyword)
+        automaton.make_automaton()
+        return automaton
+
+    def _compile_hyperscan_db(self):
+        """Second choice without pyahocorasick: Hyperscan literal database (None if unavailable)"""
+        keywords = [kw.encode('utf-8', 'surrogateescape') for kw in self._suspicious_lower if kw]
+        if not HAS_HYPERSCAN or not keywords:
+            return None
+        flags = hyperscan.HS_FLAG_SINGLEMATCH
+        if all(kw.isascii() for kw in keywords):
+            flags |= hyperscan.HS_FLAG_CASELESS
+        try:
+            db = hyperscan.Database()
+            db.compile(
+                expressions=keywords,
+                ids=list(range(len(keywords))),
+                elements=len(keywords),
+                flags=flags,
+                literal=True
+            )
+        except hyperscan.error as e:
+            print(f"⚠️  [WARN] Hyperscan keyword database failed ({e}), using substring scan")
+            return None
+        return db
+
+    def _compile_substring_matcher(self) -> Callable[[str], bool]:
+        """Pure-Python fallback: one generated `'kw' in cl or ...` expression, no per-keyword loop"""
+        keywords = list(dict.fromkeys(kw for kw in self._suspicious_lower if kw))
+        if len(keywords) > SUBSTRING_CODEGEN_LIMIT:
+            return lambda cl: any(kw in cl for kw in keywords)
+        expr = " or ".join(f"{kw!r} in cl" for kw in keywords) or "False"
+        namespace = {}
+        exec(f"def match(cl):\n    return {expr}\n", namespace)
+        return namespace['match']
+
+    def _hs_scan(self, cmd_lower: str) -> bool:
+        """Hyperscan keyword check (input needs no lowercasing when the database is caseless)"""
+        scratch = getattr(self._hs_local, 'scratch', None)
+        if scratch is None:
+            scratch = self._hs_local.scratch = hyperscan.Scratch(self._hs_db)
+        found = []
+        try:
+            self._hs_db.scan(cmd_lower.encode('utf-8', 'surrogateescape'),
+                             match_event_handler=_hs_stop_on_match, context=found, scratch=scratch)
+        except hyperscan.ScanTerminated:
+            pass  # stopped at the first match
+        return bool(found)
 
     def start_monitoring(self):
         raise NotImplementedError
 
+    @staticmethod
+    def _next_poll_interval(churn: float) -> float:
+        """Polling sleep for the current new-PID rate (EWMA per tick): long when idle, short when busy"""
+        return max(POLL_INTERVAL_MIN, POLL_INTERVAL_MAX / (1 + POLL_CHURN_GAIN * churn))
+
+    def _wait_next_tick(self, deadline: float, churn: float) -> float:
+        """Sleep until the next polling tick on a monotonic schedule (scan time doesn't stretch it)"""
+        deadline += self._next_poll_interval(churn)
+        now = time.monotonic()
+        if deadline < now:
+            deadline = now  # overran a whole period: start afresh rather than burst to catch up
+        self._stop.wait(deadline - now)
+        return deadline
+
+    def _run_polling(self):
+        """
+        Run the polling loop until stopped, in a child process when POLL_IN_SUBPROCESS is set
+        
+        The calling thread then only relays the child's detections, so the polling
+        scan never contends for the GIL with event-driven watchers in this process.
+        """
+        if not POLL_IN_SUBPROCESS:
+            self._polling_loop()
+            return
+        # Always spawn: forking this multi-threaded process can copy locks held by other threads
+        ctx = multiprocessing.get_context("spawn")
+        hits = ctx.Queue()
+        stop_event = ctx.Event()
+        worker = ctx.Process(
+            target=_polling_worker, args=(type(self), self.suspicious_keywords, stop_event, hits),
+            name="process-monitor-polling", daemon=True
+        )
+        try:
+            worker.start()
+        except (OSError, RuntimeError) as e:
+            print(f"⚠️  [WARN] Polling subprocess failed to start ({e}), polling in-process")
+            self._polling_loop()
+            return
+        
+        self._set_method_active('Polling', True)
+        try:
+            while not (self._stop.is_set() or self._polling_stop.is_set()) and worker.is_alive():
+                try:
+                    command, info, method = hits.get(timeout=POLL_RELAY_TIMEOUT)
+                except queue.Empty:
+                    continue
+                self._handle_suspicious_command(command, info, method)
+        finally:
+            stop_event.set()
+            worker.join(timeout=1)
+            self._set_method_active('Polling', False)
+            if worker.exitcode and self.monitoring:
+                print(f"⚠️  [ERROR] Polling subprocess exited with code {worker.exitcode}")
+
+    def _idle_without_keywords(self) -> bool:
+        """With no keywords every process is benign: skip starting watcher threads"""
+        if any(self._suspicious_lower):
+            return False
+        print(f"⚡ {self.os_type.upper()} Process Monitor: IDLE (no suspicious keywords configured)")
+        return True
+
     def stop_monitoring(self):
         self.monitoring = False
+        self._stop.set()
 
     def _is_suspicious(self, command: str) -> bool:
         if not command:
             return False
-        cmd_lower = command.lower()
-        for keyword in self.suspicious_keywords:
-            if keyword.lower() in cmd_lower:
-                return True
-        return False
+        if self._hs_caseless:
+            return self._hs_scan(command)  # the DFA folds case itself
+        return self._is_suspicious_lower(command.lower())
+
+    def _is_suspicious_lower(self, cmd_lower: str) -> bool:
+        """Keyword check for text the caller has already lowercased"""
+        if self._keyword_matcher is not None:
+            # Single pass over the command regardless of keyword count
+            return next(self._keyword_matcher.iter(cmd_lower), None) is not None
+        if self._hs_db is not None:
+            return self._hs_scan(cmd_lower)
+        return self._substring_match(cmd_lower)
+
+    def _scan_both(self, name: str, cmd: str) -> bool:
+        """One keyword scan over image name and command line (NUL keeps a keyword from spanning both)"""
+        if not cmd or cmd == name:
+            return self._is_suspicious(name)
+        return self._is_suspicious(f"{name}\x00{cmd}")
+
+    def _scan_name_and_argv(self, name: str, argv: List[str]) -> bool:
+        """_scan_both for an argv list, joining it only when a phrase keyword could straddle elements"""
+        if not argv:
+            return self._is_suspicious(name)
+        if self._has_phrase_keywords:
+            return self._scan_both(name, " ".join(argv))
+        return self._is_suspicious(name) or self._any_suspicious_in_list(argv)
+
+    def _any_suspicious_in_list(self, parts: List[str]) -> bool:
+        """Suspicion check over an argv list without joining it first when keywords allow"""
+        if self._has_phrase_keywords:
+            return self._is_suspicious(" ".join(parts))
+        return any(self._is_suspicious(part) for part in parts)
 
     def _handle_suspicious_command(self, command: str, process_info: Dict[str, Any], method: str):
+        detected_ns = time.time_ns()
+        key = (process_info.get('pid'), process_info.get('name'))
+        with self._reported_lock:
+            last_ns = self._reported.get(key)
+            if last_ns is not None and detected_ns - last_ns < REPORTED_DEDUP_WINDOW_NS:
+                return  # already reported by another detection source
+            self._reported[key] = detected_ns
+            self._reported.move_to_end(key)
+            if len(self._reported) > REPORTED_MAX:
+                self._reported.popitem(last=False)
         self.suspicious_detected += 1
-        
-        # Call callback if provided
-        if self.callback:
+        self._event_q.put((command, process_info, method, detected_ns))
+
+    def _dispatch_loop(self):
+        """Drain detections: run the callback and record history off the monitor thread"""
+        while True:
+            command, process_info, method, detected_ns = self._event_q.get()
+            if process_info.get('username') is None:
+                process_info['username'] = self._resolve_owner(process_info['pid'])
+            
+            # Call callback if provided
+            if self.callback:
+                try:
+                    self.callback(command, process_info)
+                except Exception as e:
+                    print(f"⚠️  [WARN] Callback error: {e}")
+
+            self._hist[self._hist_idx % MAX_HISTORY] = (detected_ns, command, process_info, method)
+            self._hist_idx += 1
+
+    def _resolve_owner(self, pid: int) -> str:
+        """Owner for a detection queued without one (runs on the dispatcher thread)"""
+        if HAS_PSUTIL:
             try:
-                self.callback(command, process_info)
-            except Exception as e:
-                print(f"⚠️  [WARN] Callback error: {e}")
+                return psutil.Process(pid).username()
+            except psutil.Error:
+                pass
+        return "Unknown"
 
-        self.command_history.append({
-            'timestamp': datetime.now().isoformat(),
+    def get_history(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Recent suspicious commands, oldest first
+        
+        Args:
+            limit: Return only the newest `limit` entries (default/cap: MAX_HISTORY)
+        
+        Returns:
+            History entries; only these are formatted, the ring itself is never copied or locked
+        """
+        idx = self._hist_idx  # snapshot: the dispatcher fills a slot before advancing this
+        count = MAX_HISTORY if limit is None else max(0, min(limit, MAX_HISTORY))
+        slots = [self._hist[i % MAX_HISTORY] for i in range(max(0, idx - count), idx)]
+        return [{
+            'timestamp': _iso_from_ns(detected_ns),
             'command': command,
             'process': process_info,
             'method': method
-        })
+        } for detected_ns, command, process_info, method in slots]
+
+    @property
+    def command_history(self) -> List[Dict[str, Any]]:
+        return self.get_history()
+
+    def _set_method_active(self, method: str, active: bool):
+        """Record a detection source starting or stopping"""
+        with self._methods_lock:
+            if active:
+                self._active_methods.add(method)
+            else:
+                self._active_methods.discard(method)
 
     def get_statistics(self) -> Dict[str, Any]:
+        with self._methods_lock:
+            methods = sorted(self._active_methods)
         return {
             'monitoring': self.monitoring,
             'processes_detected': self.processes_detected,
             'suspicious_detected': self.suspicious_detected,
+            'method': ' + '.join(methods) or 'None',
             'os': self.os_type
         }
 
@@ -106,120 +636,241 @@ class WindowsProcessMonitor(BaseProcessMonitor):
         super().__init__(callback, suspicious_keywords)
         self.wmi_thread = None
         self.polling_thread = None
+        self._wmi_heartbeat = 0.0  # last time the WMI loop came round; 0 once it has exited
+        self._argument_polling = False  # polling runs beside start-trace to scan non-candidate arguments
+        # Start-trace candidates for a command-line lookup when the image name alone doesn't match
+        self._wmi_argument_hosts = WMI_ARGUMENT_HOSTS | {
+            kw.split()[0] for kw in self._suspicious_lower if len(kw.split()) > 1
+        }
 
     def start_monitoring(self):
         if self.monitoring:
             return
         self.monitoring = True
+        self._stop.clear()
+        if self._idle_without_keywords():
+            return
         
-        # 1. WMI Thread (Event-driven)
         if HAS_WMI:
+            # 1. WMI Thread (Event-driven); polling only starts if it stalls or dies
+            self._wmi_heartbeat = time.time()
             self.wmi_thread = threading.Thread(target=self._wmi_monitor_loop, daemon=True)
             self.wmi_thread.start()
-        
-        # 2. Polling Thread (Backup)
-        if HAS_PSUTIL:
-            self.polling_thread = threading.Thread(target=self._polling_loop, daemon=True)
-            self.polling_thread.start()
+            if HAS_PSUTIL:
+                threading.Thread(target=self._wmi_watchdog_loop, daemon=True).start()
+        elif HAS_PSUTIL:
+            # 2. Polling Thread (no WMI)
+            self._start_polling()
             
-        print(f"⚡ Windows Process Monitor: ACTIVE (WMI: {'YES' if HAS_WMI else 'NO'}, Polling: {'YES' if HAS_PSUTIL else 'NO'})")
+        polling = ('STANDBY' if HAS_WMI else 'YES') if HAS_PSUTIL else 'NO'
+        print(f"⚡ Windows Process Monitor: ACTIVE (WMI: {'YES' if HAS_WMI else 'NO'}, Polling: {polling})")
+
+    def _resolve_owner(self, pid: int) -> str:
+        """Process token owner via its SID, with SID->account lookups cached"""
+        if not HAS_WIN32SECURITY:
+            return super()._resolve_owner(pid)
+        try:
+            handle = win32api.OpenProcess(win32con.PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+            try:
+                token = win32security.OpenProcessToken(handle, win32security.TOKEN_QUERY)
+                try:
+                    sid, _ = win32security.GetTokenInformation(token, win32security.TokenUser)
+                finally:
+                    win32api.CloseHandle(token)
+            finally:
+                win32api.CloseHandle(handle)
+            return _account_for_sid(win32security.ConvertSidToStringSid(sid))
+        except win32api.error as e:
+            logger.debug("Owner lookup failed for PID %s: %s", pid, e)
+            return "Unknown"
+
+    def _start_polling(self):
+        self._polling_stop.clear()  # also keeps a polling thread that is still winding down running
+        if self.polling_thread is not None and self.polling_thread.is_alive():
+            return
+        self.polling_thread = threading.Thread(target=self._run_polling, daemon=True)
+        self.polling_thread.start()
+
+    @staticmethod
+    def _current_pids() -> Optional[set]:
+        """Live PIDs from one kernel snapshot (psutil as fallback); None if neither is available"""
+        snapshot = _windows_process_snapshot()
+        if snapshot is not None:
+            return set(snapshot)
+        return set(psutil.pids()) if HAS_PSUTIL else None
+
+    def _wmi_watchdog_loop(self):
+        """Start the polling backup once the WMI loop stops heart-beating"""
+        while not self._stop.wait(1):
+            if time.time() - self._wmi_heartbeat > WMI_HEARTBEAT_TIMEOUT:
+                if self.monitoring:
+                    print("   [FALLBACK] WMI event loop stalled, starting polling backup")
+                    self._start_polling()
+                return
 
     def _wmi_monitor_loop(self):
-        pythoncom.CoInitialize()
+        # Multithreaded apartment: no per-call marshalling to an STA, connection usable from helpers
+        pythoncom.CoInitializeEx(pythoncom.COINIT_MULTITHREADED)
         wmi_working = False
         try:
-            w = wmi.WMI()
+            try:
+                w = wmi.WMI()
+            except (wmi.x_wmi, pythoncom.com_error) as e:
+                print(f"   [WMI] MTA connection failed ({e}), retrying single-threaded")
+                pythoncom.CoUninitialize()
+                pythoncom.CoInitialize()
+                w = wmi.WMI()
             # 1. WMI Event Watcher initialization with delay fallback
             print("   [WMI] Attempting to initialize event watcher...")
             try:
-                # FIXED: Use delay_secs for more stable WMI event delivery
-                watcher = w.Win32_Process.watch_for(
-                    notification_type="creation",
-                    delay_secs=1
-                )
+                # Kernel (ETW) process start trace: pushed events, no WITHIN polling window (admin only)
+                watcher = w.Win32_ProcessStartTrace.watch_for()
+                use_start_trace = True
             except Exception as e:
-                print(f"   [ERROR] WMI event watcher failed: {e}")
-                print("   [FALLBACK] Using polling-only mode")
-                wmi_working = False
-                return
+                print(f"   [WMI] Process start trace unavailable ({e}), using instance creation events")
+                use_start_trace = False
+                try:
+                    # FIXED: Use delay_secs for more stable WMI event delivery
+                    watcher = w.Win32_Process.watch_for(
+                        notification_type="creation",
+                        delay_secs=WMI_DELAY_SECS
+                    )
+                except Exception as e:
+                    print(f"   [ERROR] WMI event watcher failed: {e}")
+                    print("   [FALLBACK] Using polling-only mode")
+                    wmi_working = False
+                    return
 
             wmi_working = True
             print("   [WMI] ✅ Event watcher initialized successfully")
+            if use_start_trace and HAS_PSUTIL:
+                # Trace events carry no arguments: polling reads them for processes the name gate skips
+                self._argument_polling = True
+                self._start_polling()
+            self._set_method_active('WMI (Event-Driven)', True)
             
-            last_pulse = time.time()
-            while self.monitoring:
+            # Passive liveness: note when events last arrived instead of spawning probe processes.
+            # Silence alone doesn't mean a dead subscription (an idle host starts nothing), so a
+            # quiet spell is checked against the PID table: new PIDs with no events means WMI is deaf
+            last_event = time.monotonic()
+            silence_pids = None  # PIDs when the current quiet spell was first checked
+            polling_cover = False  # polling started because WMI went deaf, stopped once it hears again
+            while not self._stop.is_set():
+                self._wmi_heartbeat = time.time()
                 try:
-                    # Self-Pulse: Verify monitor is hearing things
-                    if time.time() - last_pulse > WMI_PULSE_INTERVAL:
-                        subprocess.Popen(['cmd.exe', '/c', 'echo ShadowNetPulse'], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-                        last_pulse = time.time()
-
                     # Use stable timeout to avoid blocking (Bug 5)
-                    new_process = watcher(timeout_ms=WMI_TIMEOUT_MS)
-                    if new_process:
-                        name = str(new_process.Name)
-                        pid = new_process.ProcessId
-                        
-                        # Diagnostic: Show EVERY discovery instantly
-                        if "ShadowNetPulse" not in name:
-                            sys.stdout.write(f" [WMI-DISCOVERED: {name}] ")
-                            sys.stdout.flush()
-
-                        # FIXED: Better fallback chain for command line
+                    event = watcher(timeout_ms=WMI_TIMEOUT_MS)
+                    last_event = time.monotonic()
+                    silence_pids = None
+                    if polling_cover:
+                        polling_cover = False
+                        print("\n   [WMI] Events resumed, stopping polling cover")
+                        self._polling_stop.set()
+                    self._process_wmi_event(w, event, use_start_trace)
+                    
+                    # Burst: drain events already queued before going back round the loop
+                    for _ in range(WMI_DRAIN_BATCH):
                         try:
-                            cmdline = getattr(new_process, 'CommandLine', None)
-                            if not cmdline or str(cmdline).strip() == "":
-                                cmdline = getattr(new_process, 'ExecutablePath', name)
-                            if not cmdline:
-                                cmdline = name
-                            cmd = str(cmdline)
-                        except Exception as e:
-                            cmd = name
-
-                        # Aggressive forensic check
-                        is_suspicious_exe = any(kw.lower() in name.lower() for kw in self.suspicious_keywords)
-                        
-                        if self._is_suspicious(cmd) or is_suspicious_exe:
-                            self.processes_detected += 1
-                            owner = "Unknown"
-                            try:
-                                owner_info = new_process.GetOwner()
-                                if owner_info and owner_info[0]:
-                                    owner = f"{owner_info[0]}\\{owner_info[2]}"
-                            except: pass
-                            
-                            p_info = {
-                                'pid': pid,
-                                'name': name,
-                                'cmdline': [cmd],
-                                'username': owner,
-                                'parent_pid': new_process.ParentProcessId
-                            }
-                            self._handle_suspicious_command(cmd, p_info, "WMI")
+                            event = watcher(timeout_ms=0)
+                        except wmi.x_wmi_timed_out:
+                            break
+                        self._process_wmi_event(w, event, use_start_trace)
                 except wmi.x_wmi_timed_out:
-                    # Normal timeout, continue silently
+                    # Normal timeout, continue silently (unless WMI has gone quiet for too long)
+                    if (not polling_cover and not self._argument_polling
+                            and time.monotonic() - last_event > WMI_SILENCE_LIMIT):
+                        last_event = time.monotonic()  # one PID check per quiet window
+                        current_pids = self._current_pids()
+                        if silence_pids is not None and current_pids is not None and current_pids - silence_pids:
+                            print(f"\n⚠️  [WARN] Processes started but WMI delivered no events for "
+                                  f"{WMI_SILENCE_LIMIT}s, polling will cover")
+                            if HAS_PSUTIL:
+                                polling_cover = True
+                                self._start_polling()
+                        silence_pids = current_pids
                     continue
                 except Exception as e:
                     if self.monitoring:
                         print(f"\n⚠️  [WARN] WMI Error: {e}")
-                        time.sleep(1) # Prevent tight error loop
+                        self._stop.wait(1) # Prevent tight error loop
                     continue
         except Exception as e:
             print(f"⚠️  [ERROR] WMI initialization failed: {e}")
             print("   [FALLBACK] Switching to polling-only mode...")
         finally:
+            self._set_method_active('WMI (Event-Driven)', False)
+            self._wmi_heartbeat = 0.0  # wake the watchdog straight away
             pythoncom.CoUninitialize()
             
         if not wmi_working:
             print("   [INFO] WMI not available, relying on polling fallback")
 
+    def _process_wmi_event(self, w, event, use_start_trace: bool):
+        """Check one WMI process-start event and report it if suspicious"""
+        if not event:
+            return
+        if use_start_trace:
+            # Trace events carry name/PIDs only; the command line needs a synchronous WQL query,
+            # so while polling covers arguments only candidates by image name pay for it
+            name = str(event.ProcessName)
+            pid = event.ProcessID
+            parent_pid = event.ParentProcessID
+            base_name = name.lower()
+            if base_name.endswith('.exe'):
+                base_name = base_name[:-4]
+            new_process = None  # non-candidates: arguments are left to the polling loop
+            if (not self._argument_polling or base_name in self._wmi_argument_hosts
+                    or self._is_suspicious(name)):
+                matches = w.Win32_Process(ProcessId=pid)
+                new_process = matches[0] if matches else None
+        else:
+            new_process = event
+            name = str(new_process.Name)
+            pid = new_process.ProcessId
+            parent_pid = new_process.ParentProcessId
+
+        # Diagnostic: Show EVERY discovery (written by the log thread)
+        _log_event(f" [WMI-DISCOVERED: {name}] ")
+
+        # FIXED: Better fallback chain for command line
+        cmd = name
+        if new_process is not None:  # None: not looked up, or already exited
+            try:
+                cmdline = new_process.CommandLine
+                if not cmdline or str(cmdline).strip() == "":
+                    cmdline = new_process.ExecutablePath
+                if cmdline:
+                    cmd = str(cmdline)
+            except (wmi.x_wmi, pythoncom.com_error, AttributeError) as e:
+                logger.debug("WMI command line unavailable for PID %s: %s", pid, e)
+
+        # Aggressive forensic check: image name and command line share one matcher
+        if self._scan_both(name, cmd):
+            self.processes_detected += 1
+            # Owner is resolved by the dispatcher thread (no GetOwner COM call here)
+            p_info = {
+                'pid': pid,
+                'name': name,
+                'cmdline': [cmd],
+                'username': None,
+                'parent_pid': parent_pid
+            }
+            self._handle_suspicious_command(cmd, p_info, "WMI")
+
     def _polling_loop(self):
-        seen_pids = set(p.info['pid'] for p in psutil.process_iter(['pid']))
-        print("   [POLLING] Ultra-fast differential polling active (10ms interval)")
-        while self.monitoring:
+        # Baseline from the bare PID list; process_iter would build a Process per entry
+        snapshot = _windows_process_snapshot()
+        seen_pids = set(snapshot) if snapshot is not None else set(psutil.pids())
+        print("   [POLLING] Ultra-fast differential polling active (adaptive 1-100ms interval)")
+        self._set_method_active('Polling', True)
+        churn = 0.0
+        deadline = time.monotonic()
+        while not (self._stop.is_set() or self._polling_stop.is_set()):
+            new_pids = ()
             try:
-                # 1. Fetch current PIDs once (extremely fast)
-                current_pids = set(psutil.pids())
+                # 1. Fetch current PIDs once (extremely fast): one kernel call also yields names/parents
+                snapshot = _windows_process_snapshot()
+                current_pids = set(snapshot) if snapshot is not None else set(psutil.pids())
                 new_pids = current_pids - seen_pids
                 
                 # 2. Update baseline for next loop
@@ -229,36 +880,44 @@ class WindowsProcessMonitor(BaseProcessMonitor):
                 for pid in new_pids:
                     try:
                         proc = psutil.Process(pid)
-                        with proc.oneshot():
-                            name = proc.name()
+                        if snapshot is not None:
+                            name, parent_pid = snapshot[pid]
                             cmdline = proc.cmdline()
-                            full_cmd = " ".join(cmdline) if cmdline else name
-                            username = proc.username()
-                            parent_pid = proc.ppid()
+                        else:
+                            # One batched fetch instead of a call (and handle) per attribute
+                            info = proc.as_dict(attrs=['name', 'cmdline', 'ppid'])
+                            name, parent_pid = info['name'] or str(pid), info['ppid']
+                            cmdline = info['cmdline'] or []
+                        
+                        # Detect by Command Line OR by Binary Name (Fast-kill fallback);
+                        # the joined command is only built for hits
+                        if not self._scan_name_and_argv(name, cmdline):
+                            continue
+                        full_cmd = " ".join(cmdline) if cmdline else name
                         
-                        # Detect by Command Line OR by Binary Name (Fast-kill fallback)
-                        is_suspicious_exe = any(kw.lower() in name.lower() for kw in self.suspicious_keywords)
-                        is_suspicious_cmd = self._is_suspicious(full_cmd)
+                        # Owner lookup is the costly one: only for hits
+                        username = proc.username()
                         
-                        if is_suspicious_cmd or is_suspicious_exe:
-                            self._handle_suspicious_command(full_cmd, {
-                                'pid': pid,
-                                'name': name,
-                                'cmdline': cmdline or [name],
-                                'username': username,
-                                'parent_pid': parent_pid
-                            }, "Polling")
+                        self._handle_suspicious_command(full_cmd, {
+                            'pid': pid,
+                            'name': name,
+                            'cmdline': cmdline or [name],
+                            'username': username,
+                            'parent_pid': parent_pid
+                        }, "Polling")
                     except (psutil.NoSuchProcess, psutil.AccessDenied):
                         continue
             except Exception as e:
                 if self.monitoring:
                     print(f"⚠️  [ERROR] Windows Polling Error: {e}")
             
-            time.sleep(POLLING_INTERVAL)
+            churn += POLL_CHURN_ALPHA * (len(new_pids) - churn)
+            deadline = self._wait_next_tick(deadline, churn)
+        self._set_method_active('Polling', False)
 
 
 class UnixProcessMonitor(BaseProcessMonitor):
-    """Linux/Mac monitor using Optimized Polling"""
+    """Linux/Mac monitor using Netlink proc events (Linux) or Optimized Polling"""
     def __init__(self, callback: Optional[Callable] = None, suspicious_keywords: List[str] = None):
         super().__init__(callback, suspicious_keywords)
         self.polling_thread = None
@@ -267,74 +926,205 @@ class UnixProcessMonitor(BaseProcessMonitor):
         if self.monitoring:
             return
         self.monitoring = True
+        self._stop.clear()
+        if self._idle_without_keywords():
+            return
         
         if HAS_PSUTIL:
-            self.polling_thread = threading.Thread(target=self._polling_loop, daemon=True)
+            # Linux: block on kernel exec events; Mac (or no netlink): differential polling
+            loop = self._netlink_monitor_loop if self.os_type == 'linux' else self._run_polling
+            self.polling_thread = threading.Thread(target=loop, daemon=True)
             self.polling_thread.start()
-            print(f"⚡ {self.os_type.upper()} Process Monitor: ACTIVE (Polling-Based)")
         else:
             print(f"❌ [ERROR] {self.os_type.upper()} Monitor Failed: psutil not installed")
             self.monitoring = False # Properly set to False (Bug 12)
             return
 
+    def _inspect_pid(self, pid: int, method: str):
+        """Check a new PID's command line and report it if suspicious"""
+        if HAS_PROCFS:
+            self._inspect_pid_procfs(pid, method)
+            return
+        try:
+            proc = psutil.Process(pid)
+            
+            # Fast-fail checks
+            try:
+                cmdline = proc.cmdline()
+            except (psutil.ZombieProcess, psutil.AccessDenied, psutil.NoSuchProcess):
+                return
+                
+            if not cmdline: return
+            
+            if not self._any_suspicious_in_list(cmdline):
+                return
+            full_cmd = " ".join(cmdline)
+            
+            # Metadata only for hits, fetched in one batched call (unreadable fields come back None)
+            meta = proc.as_dict(attrs=['name', 'username', 'ppid'])
+            p_info = {
+                'pid': pid,
+                'name': meta['name'],
+                'cmdline': cmdline,
+                'username': meta['username'],
+                'parent_pid': meta['ppid']
+            }
+            self._handle_suspicious_command(full_cmd, p_info, method)
+                
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            pass
+
+    def _inspect_pid_procfs(self, pid: int, method: str):
+        """Linux fast path: cmdline then (hits only) status, read straight from /proc"""
+        try:
+            cmdline = _read_proc_cmdline(pid)
+            if not cmdline:
+                return  # kernel thread or zombie
+            
+            if not self._any_suspicious_in_list(cmdline):
+                return
+            full_cmd = " ".join(cmdline)
+            
+            p_info = {'pid': pid, 'cmdline': cmdline}
+            p_info.update(_read_proc_status(pid, cmdline))
+            self._handle_suspicious_command(full_cmd, p_info, method)
+        except (FileNotFoundError, ProcessLookupError, PermissionError):
+            pass  # exited, or hidden from us
+
+    def _open_proc_connector(self) -> socket.socket:
+        """Subscribe to the kernel proc connector (needs CAP_NET_ADMIN)"""
+        sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_CONNECTOR)
+        try:
+            # Port 0: the kernel assigns a unique nl_pid, so a second connector socket in this
+            # process (a monitor restart) doesn't fail with EADDRINUSE
+            sock.bind((0, CN_IDX_PROC))
+            port_id = sock.getsockname()[0]
+            try:
+                # Deeper queue so fork storms don't overflow it (FORCE ignores rmem_max; needs CAP_NET_ADMIN)
+                sock.setsockopt(socket.SOL_SOCKET, getattr(socket, 'SO_RCVBUFFORCE', 33), NETLINK_SOCKET_RCVBUF)
+            except OSError:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, NETLINK_SOCKET_RCVBUF)
+            op = struct.pack("=I", PROC_CN_MCAST_LISTEN)
+            cn_msg = _CN_MSG.pack(CN_IDX_PROC, CN_VAL_PROC, 0, 0, len(op), 0) + op
+            sock.send(_NLMSGHDR.pack(_NLMSGHDR.size + len(cn_msg), NLMSG_DONE, 0, 0, port_id) + cn_msg)
+            sock.settimeout(NETLINK_RECV_TIMEOUT)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def _catch_up_sweep(self, since: float):
+        """Inspect processes started at or after `since` (recovers events lost to overflow)"""
+        print("⚠️  [WARN] Netlink event queue overflowed, rescanning recent processes")
+        for pid in _iter_pids():
+            try:
+                # create_time has clock-tick (10ms) resolution: allow one tick of slack
+                if psutil.Process(pid).create_time() >= since - 0.01:
+                    self._inspect_pid(pid, "Netlink")
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                continue
+
+    def _netlink_monitor_loop(self):
+        """
+        Event-Driven Monitoring (Linux)
+        Strategy: Sleep in recv() until the kernel reports an exec, then inspect only that PID.
+        Falls back to differential polling when the proc connector is unavailable.
+        """
+        try:
+            sock = self._open_proc_connector()
+        except (OSError, AttributeError) as e:
+            print(f"   [INFO] Netlink proc connector unavailable ({e}), using polling")
+            print(f"⚡ {self.os_type.upper()} Process Monitor: ACTIVE (Polling-Based)")
+            self._run_polling()
+            return
+        
+        print(f"⚡ {self.os_type.upper()} Process Monitor: ACTIVE (Netlink Event-Driven)")
+        self._set_method_active('Netlink (Event-Driven)', True)
+        try:
+            # Subscribed first, so nothing slips between this sweep and the event stream (Bug 6)
+            for pid in _iter_pids():
+                self._inspect_pid(pid, "Netlink")
+            
+            last_recv = time.time()
+            while not self._stop.is_set():
+                try:
+                    data = sock.recv(NETLINK_RECV_BUFSIZE)
+                except socket.timeout:
+                    last_recv = time.time()
+                    continue
+                except OSError as e:
+                    if e.errno == errno.ENOBUFS:
+                        # Queue overflowed and exec events were dropped: rescan what started since
+                        self._catch_up_sweep(last_recv)
+                        last_recv = time.time()
+                        continue
+                    if self.monitoring:
+                        print(f"⚠️  [WARN] Netlink receive error: {e}")
+                    continue
+                last_recv = time.time()
+                
+                offset = 0
+                while offset + _NLMSGHDR.size <= len(data):
+                    msg_len = _NLMSGHDR.unpack_from(data, offset)[0]
+                    if msg_len < _NLMSGHDR.size:
+                        break
+                    event_at = offset + _NLMSGHDR.size + _CN_MSG.size
+                    if event_at + _PROC_EVENT.size + _EXEC_EVENT.size <= offset + msg_len:
+                        what = _PROC_EVENT.unpack_from(data, event_at)[0]
+                        if what == PROC_EVENT_EXEC:
+                            _, tgid = _EXEC_EVENT.unpack_from(data, event_at + _PROC_EVENT.size)
+                            self._inspect_pid(tgid, "Netlink")
+                    offset += msg_len
+        finally:
+            sock.close()
+
     def _polling_loop(self):
         """
         High-Performance Differential Polling (Linux/Mac)
         Strategy: Only fetch full details for NEW PIDs to minimize I/O overhead.
-        Target Latency: ~5ms
+        Target Latency: 1-100ms, tightening as process churn rises
         """
+        # PID bitsets (one bit per PID) for this tick and the last, swapped each tick.
         # FIXED: Initialize empty to catch ALL processes on first run (Bug 6)
-        known_pids = set()
+        size = _pid_bitset_size()
+        known_bits, current_bits, blank = bytearray(size), bytearray(size), bytes(size)
+        self._set_method_active('Polling', True)
         
-        while self.monitoring:
+        churn = 0.0
+        deadline = time.monotonic()
+        while not self._stop.is_set():
+            new_count = 0
             try:
                 # 1. Light scan: Get current PIDs only
-                current_pids = set(psutil.pids())
-                
-                # 2. find new processes (Differential)
-                new_pids = current_pids - known_pids
+                current_bits[:] = blank
                 
-                if new_pids:
-                    for pid in new_pids:
-                        try:
-                            # 3. Deep interaction only for NEW targets
-                            proc = psutil.Process(pid)
-                            
-                            # Fast-fail checks
-                            try:
-                                cmdline = proc.cmdline()
-                            except (psutil.ZombieProcess, psutil.AccessDenied, psutil.NoSuchProcess):
-                                continue
-                                
-                            if not cmdline: continue
-                            
-                            full_cmd = " ".join(cmdline)
-                            
-                            if self._is_suspicious(full_cmd):
-                                p_info = {
-                                    'pid': pid,
-                                    'name': proc.name(),
-                                    'cmdline': cmdline,
-                                    'username': proc.username(),
-                                    'parent_pid': proc.ppid()
-                                }
-                                self._handle_suspicious_command(full_cmd, p_info, "Fast-Poll")
-                                
-                        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                            pass
-                
-                # Update baseline
-                known_pids = current_pids
+                for pid in _iter_pids():
+                    # 2. find new processes (Differential): not present on the last tick
+                    byte, bit = pid >> 3, 1 << (pid & 7)
+                    try:
+                        current_bits[byte] |= bit
+                    except IndexError:
+                        # pid_max was raised at runtime: grow both bitsets in place, mid-tick
+                        grow = bytes(byte + 1 - len(current_bits))
+                        current_bits.extend(grow)
+                        known_bits.extend(grow)
+                        blank = bytes(len(current_bits))
+                        current_bits[byte] |= bit
+                    if not known_bits[byte] & bit:
+                        # 3. Deep interaction only for NEW targets
+                        new_count += 1
+                        self._inspect_pid(pid, "Fast-Poll")
                 
-                # 4. Cleanup dead PIDs from set to prevent memory growth (optional but good)
-                # (handled by reassignment above)
+                # Update baseline (dead PIDs drop out with the swap)
+                known_bits, current_bits = current_bits, known_bits
                 
             except Exception as e:
                 if self.monitoring:
                     print(f"⚠️  [ERROR] Unix Polling Error: {e}")
             
             # Adaptive High-Speed Sleep
-            time.sleep(UNIX_POLLING_INTERVAL)
+            churn += POLL_CHURN_ALPHA * (new_count - churn)
+            deadline = self._wait_next_tick(deadline, churn)
 
 
 def ProcessMonitor(callback: Optional[Callable] = None, suspicious_keywords: List[str] = None):
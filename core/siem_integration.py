@@ -42,6 +42,8 @@ class SIEMIntegration:
             platform.value: 0 for platform in SIEMPlatform
         }
         self.failed_events = 0
+        self._syslog_sock: Optional[socket.socket] = None  # one UDP socket reused for every event
+        self._http = requests.Session()  # keep-alive: HTTP(S) platforms reuse pooled connections
     
     def send_event(
         self,
@@ -162,7 +164,7 @@ class SIEMIntegration:
                 'Content-Type': 'application/json'
             }
             
-            response = requests.post(
+            response = self._http.post(
                 f"{hec_url}/services/collector/event",
                 json=payload,
                 headers=headers,
@@ -193,7 +195,7 @@ class SIEMIntegration:
                 'Content-Type': 'application/json'
             }
             
-            response = requests.post(
+            response = self._http.post(
                 f"{api_url}/api/ariel/events",
                 json={'events': [leef_event]},
                 headers=headers,
@@ -227,7 +229,7 @@ class SIEMIntegration:
             # ECS (Elastic Common Schema) format
             ecs_event = self._format_as_ecs(event_data)
             
-            response = requests.post(
+            response = self._http.post(
                 f"{elastic_url}/{elastic_index}/_doc",
                 json=ecs_event,
                 headers=headers,
@@ -252,7 +254,7 @@ class SIEMIntegration:
             # CEF (Common Event Format) for ArcSight
             cef_event = self._format_as_cef(event_data)
             
-            response = requests.post(
+            response = self._http.post(
                 arcsight_url,
                 data=cef_event,
                 headers={'Content-Type': 'text/plain'},
@@ -279,7 +281,7 @@ class SIEMIntegration:
                 'Content-Type': 'application/json'
             }
             
-            response = requests.post(
+            response = self._http.post(
                 f"{logrhythm_url}/lr-admin-api/logs",
                 json=event_data,
                 headers=headers,
@@ -317,10 +319,10 @@ class SIEMIntegration:
             message = json.dumps(event_data)
             syslog_message = f"<{priority}>1 {event_data.get('timestamp')} {socket.gethostname()} ShadowNetNexus - - - {message}\n"
             
-            # Send via UDP
-            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            sock.sendto(syslog_message.encode('utf-8'), (syslog_server, syslog_port))
-            sock.close()
+            # Send via UDP (one datagram per event, RFC 5426)
+            if self._syslog_sock is None:
+                self._syslog_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._syslog_sock.sendto(syslog_message.encode('utf-8'), (syslog_server, syslog_port))
             
             return True
         
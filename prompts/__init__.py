@@ -1,4 +1,4 @@
 """
 ShadowNet Nexus - Prompts Package
 """
-from .enhanced_prompts import IMPROVED_COMMAND_ANALYSIS_PROMPT
+from .enhanced_prompts import IMPROVED_COMMAND_ANALYSIS_PROMPT, render_command_analysis_prompt
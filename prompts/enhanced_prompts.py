@@ -3,18 +3,20 @@ ShadowNet Nexus - Enhanced Prompt Library
 Centralized storage for complex AI prompts
 """
 
+from string import Template
+
 IMPROVED_COMMAND_ANALYSIS_PROMPT = """
 You are an expert Cyber Forensics AI specializing in Anti-Forensics detection.
 Analyze the following command execution context to determine if it represents an attempt to destroy evidence, hide tracks, or impede a forensic investigation.
 
 CONTEXT:
-- Command: {{command_line}}
-- Process Name: {{process_name}} (PID: {{pid}})
-- Parent Process: {{parent_name}} (PID: {{parent_pid}})
-- User: {{user}}
-- Time: {{timestamp}}
-- Working Directory: {{cwd}}
-- Elevated Privileges: {{is_elevated}}
+- Command: ${command_line}
+- Process Name: ${process_name} (PID: ${pid})
+- Parent Process: ${parent_name} (PID: ${parent_pid})
+- User: ${user}
+- Time: ${timestamp}
+- Working Directory: ${cwd}
+- Elevated Privileges: ${is_elevated}
 
 Your task is to identify anti-forensics techniques such as:
 1. Log Clearing (wevtutil, Clear-EventLog, rm -rf /var/log, etc.)
@@ -26,7 +28,7 @@ Your task is to identify anti-forensics techniques such as:
 Analyze the INTENT and SEVERITY. 
 
 Respond ONLY with a valid JSON object in the following format:
-{{
+{
   "is_anti_forensics": boolean,
   "confidence": float (0.0 to 1.0),
   "category": "log_clearing|artifact_deletion|timestamp_manipulation|obfuscation|renamed_binary|credential_theft|persistence|benign|unknown",
@@ -37,5 +39,13 @@ Respond ONLY with a valid JSON object in the following format:
   "likely_threat_actor": "Briefly mention if TTPs match known groups, or 'Unknown'",
   "mitre_attack_ttps": ["T1070.001", "..."],
   "context_notes": "Any other relevant forensic observations"
-}}
+}
 """
+
+# Parsed once at import; placeholders are ${name}, so the JSON braces need no escaping
+IMPROVED_COMMAND_ANALYSIS_TEMPLATE = Template(IMPROVED_COMMAND_ANALYSIS_PROMPT)
+
+
+def render_command_analysis_prompt(**context) -> str:
+    """Fill IMPROVED_COMMAND_ANALYSIS_PROMPT; every placeholder must be supplied"""
+    return IMPROVED_COMMAND_ANALYSIS_TEMPLATE.substitute(context)
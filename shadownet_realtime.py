@@ -6,23 +6,45 @@ OPTIMIZED: Background processing and deduplication for high-volume attacks.
 
 import os
 import sys
+import logging
+import logging.handlers
+import hashlib
 import time
 import threading
 import queue
-import yaml
-import json
+import orjson
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
 from dotenv import load_dotenv
 
-# Load environment
-load_dotenv()
+try:
+    import ahocorasick
+    HAS_AHOCORASICK = True
+except ImportError:
+    HAS_AHOCORASICK = False
+
+try:
+    import hyperscan
+    HAS_HYPERSCAN = True
+except ImportError:
+    HAS_HYPERSCAN = False
 
 # --- Constants (Bug 14) ---
 DEDUPLICATION_WINDOW = 2.0  # seconds (Bug 9)
 SNAPSHOT_TIMEOUT = 5.0      # seconds
 STATUS_CHECK_INTERVAL = 60  # seconds
 SHUTDOWN_TIMEOUT = 5.0      # seconds
+RECENT_COMMANDS_MAX = 4096  # dedup entries kept (least recently seen evicted first)
+INCIDENT_BATCH_MAX = 64     # queued incidents the worker takes per wake-up
+STAGE_QUEUE_MAX = 1024      # per-stage backlog; on overflow the oldest waiting item is dropped
+PERSIST_PUT_TIMEOUT = 5     # seconds an incident waits for room in the persist stage before dropping
+INCIDENT_LOG_PATH = Path("evidence") / "incidents.jsonl"  # append-only, one compact JSON line per incident
+THREAT_LOG_MAX = 1024       # incidents kept in memory
+AI_VERDICT_TTL = 300.0      # seconds a Gemini verdict is reused for the same process + command
+AI_VERDICT_MAX = 1024       # cached verdicts (least recently used evicted first)
 
 def print_header():
     print("-" * 61)
@@ -30,18 +52,7 @@ def print_header():
     print("   Complete Forensic Intelligence & Attack Detection")
     print("-" * 61)
 
-print_header()
-
-# Check API key
-api_key = os.getenv('GEMINI_API_KEY')
-if not api_key:
-    print("❌ ERROR: GEMINI_API_KEY not found in .env file")
-    sys.exit(1)
-
-print(f"[OK] API Key loaded: {api_key[:20]}...{api_key[-10:]}\n")
-
 # --- Import All Core Components ---
-print("[MSG] Loading core modules...")
 from core.process_monitor import ProcessMonitor, is_admin
 from core.proactive_evidence_collector import ProactiveEvidenceCollector
 from core.gemini_command_analyzer import GeminiCommandAnalyzer
@@ -51,193 +62,311 @@ from core.gemini_report_generator import GeminiReportGenerator
 from core.incident_report_generator import IncidentReportGenerator
 from core.gemini_behavior_analyzer import GeminiBehaviorAnalyzer
 from core.behavior_monitor import BehavioralMonitor
+from utils import load_config
 
-# --- Load Configuration ---
-config_path = Path(__file__).parent / 'config' / 'config.yaml'
-with open(config_path, 'r') as f:
-    config = yaml.safe_load(f)
-
-# FIXED: Robust keyword loading and validation (Bug 8)
-keywords_config = config['shadownet']['monitoring'].get('suspicious_keywords', [])
-if not keywords_config:
-    keywords = []
-elif isinstance(keywords_config, str):
-    keywords = [keywords_config]
-elif isinstance(keywords_config, list):
-    keywords = keywords_config
-else:
-    print(f"⚠️  [WARN] Invalid keyword format: {type(keywords_config)}")
-    keywords = []
-
-if not keywords:
-    print("❌ [ERROR] No keywords loaded from config!")
-    print("   Check config/config.yaml - 'suspicious_keywords' section")
-    sys.exit(1)
-
-print(f"[OK] Loaded {len(keywords)} detection keywords")
-
-# FIXED: Admin Check Happening Early
-is_root = is_admin()
-
-print("\n" + "="*80)
-print(f"✅ SHADOWNET v4.0 IS NOW ACTIVE ({'ADMIN/ROOT' if is_root else 'USER MODE'})")
-if not is_root:
-    print("⚠️  WARNING: Running in USER MODE. Forensic commands (wevtutil) will NOT be detected.")
-print("="*80)
-
-# --- Initialize System Components ---
-print("\n" + "!"*80)
-print("🚀 SHADOWNET NEXUS v4.0 - ULTIMATE SPEED ENGINE STARTING...")
-print("!"*80 + "\n")
-
-# 1. Evidence Engine
-capture_net = config['shadownet']['monitoring'].get('enable_network_monitoring', True)
-evidence_collector = ProactiveEvidenceCollector(
-    evidence_vault_path="./evidence", 
-    enabled=True, 
-    capture_network=capture_net,
-    suspicious_keywords=keywords  # Pass ALL keywords from config
-)
-print(f"   [OK] Evidence Vault: {evidence_collector.os_type.upper()} Mode")
-
-# 2. AI Command Engine
-ai_analyzer = GeminiCommandAnalyzer(api_key)
-print(f"   [OK] AI Command Analyzer: {ai_analyzer.model_name}")
-
-# 3. Behavior Engine
-behavior_analyzer = GeminiBehaviorAnalyzer(api_key)
-print(f"   [OK] AI Behavior Analyzer: {behavior_analyzer.model_name}")
-
-# 4. SIEM & Alerting Engine
-siem = SIEMIntegration(config={'syslog_server': '127.0.0.1', 'syslog_port': 514})
-alert_mgr = AlertManager(config={})
-print(f"   [OK] SIEM/Alerting: Syslog & Multi-Channel Enabled")
-
-# 5. Reporting Engine
-report_gen = GeminiReportGenerator(api_key)
-incident_reporter = IncidentReportGenerator(evidence_path="./evidence")
-print(f"   [OK] Reporting Engine: Forensic & Executive Ready")
+# Incident severity -> alert severity (incidents are only ever CRITICAL or HIGH)
+ALERT_SEVERITY = {"CRITICAL": AlertSeverity.CRITICAL, "HIGH": AlertSeverity.HIGH}
 
 # --- Global State & Queueing ---
 detections = 0
 snapshots = 0
 incidents = 0
-threat_log = []
-incident_queue = queue.Queue()
-recent_commands = {}  # For deduplication: {command_key: last_time}
+threat_log = deque(maxlen=THREAT_LOG_MAX)  # recent incidents only; the full archive is INCIDENT_LOG_PATH
+incident_queue = queue.SimpleQueue()  # C-level FIFO: nothing joins it, so no task tracking
+# Pipeline after analysis: disk and network each get their own stage, so neither stalls the other
+persist_queue = queue.Queue(maxsize=STAGE_QUEUE_MAX)
+transmit_queue = queue.Queue(maxsize=STAGE_QUEUE_MAX)
+stage_drops = 0  # items discarded because a stage fell STAGE_QUEUE_MAX behind
+ai_verdicts = OrderedDict()  # {blake2b(name, command): (monotonic time, ai_res)}, only touched by log_worker
+recent_commands = OrderedDict()  # For deduplication: {command_key: last monotonic time}, LRU-bounded
 recent_commands_lock = threading.Lock()  # Bug 5: thread-safe access
 MY_PID = os.getpid()
 monitor = None  # Bug 1: initialize to None so shutdown is always safe
 
-def log_worker() -> None:  # Added type hints (Bug 15)
-    """Background thread to process incident reports and snapshots without blocking detection"""
-    global incidents, snapshots
-    print("   [OK] Background Incident Processor Started")
-    
+class ConsoleHandler(logging.StreamHandler):
+    """stdout handler that honours a per-record line ending (extra={'end': ''})"""
+    def emit(self, record):
+        self.terminator = getattr(record, 'end', '\n')
+        super().emit(record)
+
+# Runtime messages are queued by the detection and worker threads; one listener thread writes stdout
+console = logging.getLogger('shadownet.console')
+console.setLevel(logging.INFO)
+console.propagate = False
+console_queue = queue.SimpleQueue()
+console.addHandler(logging.handlers.QueueHandler(console_queue))
+console_listener = logging.handlers.QueueListener(console_queue, ConsoleHandler(sys.stdout))
+
+# Set by main(); read by the handlers and workers below
+config = None
+keywords = []
+keywords_lower = []
+keyword_automaton = None
+keyword_hs_db = None
+evidence_collector = ai_analyzer = siem = alert_mgr = incident_reporter = None
+incident_pool = None
+keyword_hs_local = threading.local()  # Hyperscan scratch space is per scanning thread
+
+EVIDENCE_TYPES = ('Event Logs', 'Process State', 'Network Connections', 'VSS State', 'File Metadata')
+
+@dataclass(slots=True)
+class IncidentData:
+    """One analyzed incident as it moves through the persist and transmit stages"""
+    incident_id: str
+    threat_type: str
+    command: str
+    process_info: dict
+    snapshot_id: str
+    detection_time: str
+    ai_analysis: dict
+    severity: str
+    evidence_types: tuple = EVIDENCE_TYPES
+
+    def as_dict(self) -> dict:
+        """Shallow dict view for consumers that take incident dicts (the report generator)"""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+def offer_to_stage(stage_queue: queue.Queue, item: IncidentData, timeout: float = 0) -> None:
+    """Hand an item to the next stage, waiting up to timeout for room; a still-full stage drops (and logs) its oldest item"""
+    global stage_drops
+    if timeout:
+        try:
+            stage_queue.put(item, timeout=timeout)
+            return
+        except queue.Full:
+            pass
     while True:
         try:
-            item = incident_queue.get()
-            if item is None: break # Shutdown signal
-            
-            # Removed task_event race condition logic (Bug 1)
-
-            command = item['command']
-            matched_keywords = item['matched_keywords']
-            process_info = item['process_info']
-            is_critical = item['is_critical']
-            snapshot_id = item.get('snapshot_id', 'N/A')
-            
-            # Deep AI Analysis in background
-            ai_res = ai_analyzer.analyze_command(command, process_info)
-            severity = "CRITICAL" if is_critical or ai_res.get('severity') == 'CRITICAL' else "HIGH"
-
-            timestamp = datetime.now().strftime('%Y%m%d-%H%M%S')
-            incident_id = f"INC-{timestamp}"
-            incident_dir = Path("evidence/incidents") / incident_id
-            incident_dir.mkdir(parents=True, exist_ok=True)
-            # Snapshots are now taken in the foreground for speed, but we could take more here if needed
-            if snapshot_id != "N/A":
-                snapshots += 1
-
-            # 2. Generate Forensic Markdown Report
-            incident_data = {
-                'incident_id': incident_id,
-                'threat_type': ai_res.get('category', 'unknown'),
-                'command': command,
-                'process_info': process_info,
-                'snapshot_id': snapshot_id,
-                'detection_time': datetime.now().isoformat(),
-                'ai_analysis': ai_res,
-                'severity': severity,
-                'evidence_types': ['Event Logs', 'Process State', 'Network Connections', 'VSS State', 'File Metadata']
-            }
+            stage_queue.put_nowait(item)
+            return
+        except queue.Full:
             try:
-                md_report = incident_reporter.generate_incident_report(incident_data)
-            except Exception as e:
-                print(f"   [WARN] Failed to generate markdown report: {e}")
+                dropped = stage_queue.get_nowait()
+                stage_queue.task_done()
+                stage_drops += 1
+                console.warning(f"   [WARN] Stage backlog full: dropped incident {getattr(dropped, 'incident_id', dropped)}")
+            except queue.Empty:
+                pass
+
+incident_stamp = (None, "", 0)  # (epoch second, its '%Y%m%d-%H%M%S' tag, incidents issued in it)
+
+def next_incident_id(detected_ts: float) -> str:
+    """INC-<second>[-NNN]: strftime once per distinct second, a counter for repeats within it"""
+    global incident_stamp
+    second = int(detected_ts)
+    last_second, tag, seq = incident_stamp
+    if second == last_second:
+        seq += 1
+    else:
+        tag, seq = datetime.fromtimestamp(second).strftime('%Y%m%d-%H%M%S'), 0
+    incident_stamp = (second, tag, seq)
+    return f"INC-{tag}" if seq == 0 else f"INC-{tag}-{seq:03d}"
+
+def cached_analysis(command: str, process_info: dict) -> dict:
+    """Gemini verdict for a command, reusing one from the last AI_VERDICT_TTL seconds for repeats"""
+    proc_name = process_info.get('name') or 'Unknown'
+    key = hashlib.blake2b(f"{proc_name}\x00{command}".encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+    now = time.monotonic()
+    cached = ai_verdicts.get(key)
+    if cached is not None and now - cached[0] < AI_VERDICT_TTL:
+        ai_verdicts.move_to_end(key)
+        return dict(cached[1])
+
+    ai_res = ai_analyzer.analyze_command(command, process_info)
+    if 'error' in ai_res:
+        return ai_res  # failed calls (rate limits, timeouts) are retried next time
+    ai_verdicts[key] = (now, ai_res)
+    ai_verdicts.move_to_end(key)
+    while len(ai_verdicts) > AI_VERDICT_MAX:
+        ai_verdicts.popitem(last=False)
+    return ai_res
+
+def process_incident(item: dict) -> None:
+    """Analyze one queued incident and pass it on to the persist and transmit stages"""
+    global snapshots
+    
+    # Removed task_event race condition logic (Bug 1)
+
+    command = item['command']
+    matched_keywords = item['matched_keywords']
+    process_info = item['process_info']
+    is_critical = item['is_critical']
+    snapshot_id = item.get('snapshot_id', 'N/A')
+    # Stamped as a float at detection; formatted here, off the detection path
+    detected_ts = item.get('detected_at') or time.time()
+
+    # Deep AI Analysis in background (repeats of a recent command reuse its verdict)
+    ai_res = cached_analysis(command, process_info)
+    severity = "CRITICAL" if is_critical or ai_res.get('severity') == 'CRITICAL' else "HIGH"
+
+    # Same-second incidents used to share an ID, and with it one incident folder and report
+    incident_id = next_incident_id(detected_ts)
+    # Snapshots are now taken in the foreground for speed, but we could take more here if needed
+    if snapshot_id != "N/A":
+        snapshots += 1
+
+    incident_data = IncidentData(
+        incident_id=incident_id,
+        threat_type=ai_res.get('category', 'unknown'),
+        command=command,
+        process_info=process_info,
+        snapshot_id=snapshot_id,
+        detection_time=datetime.fromtimestamp(detected_ts).isoformat(),
+        ai_analysis=ai_res,
+        severity=severity,
+    )
+    offer_to_stage(persist_queue, incident_data, timeout=PERSIST_PUT_TIMEOUT)  # the record is the evidence: wait first
+    offer_to_stage(transmit_queue, incident_data)
+
+def persist_incident(incident_data: IncidentData) -> bytes:
+    """Persist stage: markdown report (creates the incident folder); returns the incident log line"""
+    global incidents
+    incident_id = incident_data.incident_id
+
+    # 2. Generate Forensic Markdown Report
+    try:
+        md_report = incident_reporter.generate_incident_report(incident_data.as_dict())
+    except Exception as e:
+        console.warning(f"   [WARN] Failed to generate markdown report: {e}")
 
-            # 3. Direct SIEM Transmission (Bug 3: No longer silent)
-            try:
-                siem.send_event({
-                    'type': 'anti_forensics',
-                    'severity': severity,
-                    'command': command,
-                    'incident_id': incident_id,
-                    'confidence': ai_res.get('confidence', 0)
-                }, [SIEMPlatform.SYSLOG])
-            except Exception as e:
-                print(f"   [ERROR] SIEM transmission failed for {incident_id}: {e}")
+    incidents += 1
+    threat_log.append(incident_data)
+    console.info(f"[OK] Background: Logged {incident_id}")
+
+    # 5. Raw JSON line for the shared log (orjson serializes the dataclass directly)
+    return orjson.dumps(incident_data, default=str,
+                        option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS)
+
+def send_siem_event(incident_data: IncidentData) -> None:
+    """Direct SIEM Transmission (Bug 3: No longer silent)"""
+    try:
+        siem.send_event({
+            'type': 'anti_forensics',
+            'severity': incident_data.severity,
+            'command': incident_data.command,
+            'incident_id': incident_data.incident_id,
+            'confidence': incident_data.ai_analysis.get('confidence', 0)
+        }, [SIEMPlatform.SYSLOG])
+    except Exception as e:
+        console.error(f"   [ERROR] SIEM transmission failed for {incident_data.incident_id}: {e}")
+
+def send_incident_alert(incident_data: IncidentData) -> None:
+    """Critical Alerting (Bug 3: No longer silent)"""
+    try:
+        alert_mgr.send_alert(
+            title=f"[ALERT] THREAT DETECTED",
+            message=f"Command: {incident_data.command[:100]}...",
+            severity=ALERT_SEVERITY.get(incident_data.severity, AlertSeverity.HIGH),
+            channels=[AlertChannel.CONSOLE],
+            metadata=incident_data.ai_analysis
+        )
+    except Exception as e:
+        console.error(f"   [ERROR] Alert delivery failed for {incident_data.incident_id}: {e}")
+
+def transmit_incident(incident_data: IncidentData) -> None:
+    """Transmit stage: SIEM event and alert, sent side by side so the slower one sets the pace"""
+    wait([
+        incident_pool.submit(send_siem_event, incident_data),
+        incident_pool.submit(send_incident_alert, incident_data),
+    ])
 
-            # 4. Critical Alerting (Bug 3: No longer silent)
+def log_worker() -> None:  # Added type hints (Bug 15)
+    """Background thread to process incident reports and snapshots without blocking detection"""
+    console.info("   [OK] Background Incident Processor Started")
+    
+    while True:
+        # Block for one incident, then take whatever a burst has already queued
+        batch = [incident_queue.get()]
+        while len(batch) < INCIDENT_BATCH_MAX:
             try:
-                alert_mgr.send_alert(
-                    title=f"[ALERT] THREAT DETECTED",
-                    message=f"Command: {command[:100]}...",
-                    severity=AlertSeverity.CRITICAL if severity == "CRITICAL" else AlertSeverity.HIGH,
-                    channels=[AlertChannel.CONSOLE],
-                    metadata=ai_res
-                )
+                batch.append(incident_queue.get_nowait())
+            except queue.Empty:
+                break
+        
+        for item in batch:
+            if item is None:
+                # Shutdown signal: pass it down the pipeline
+                persist_queue.put(None)
+                transmit_queue.put(None)
+                return
+            try:
+                process_incident(item)
             except Exception as e:
-                print(f"   [ERROR] Alert delivery failed for {incident_id}: {e}")
+                console.error(f"   [ERROR] Worker Exception: {e}")
+                time.sleep(1)
 
-            # 5. Save Raw JSON
-            with open(incident_dir / "incident.json", 'w') as f:
-                json.dump(incident_data, f, indent=2)
-            
-            incidents += 1
-            threat_log.append(incident_data)
-            print(f"[OK] Background: Logged {incident_id}")
+def persist_worker() -> None:
+    """Persist stage: hold the incident log's fd open; one write and one fsync per drained batch"""
+    INCIDENT_LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(INCIDENT_LOG_PATH, os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, 'O_BINARY', 0), 0o600)
+    try:
+        while True:
+            batch = [persist_queue.get()]
+            while len(batch) < INCIDENT_BATCH_MAX:
+                try:
+                    batch.append(persist_queue.get_nowait())
+                except queue.Empty:
+                    break
             
-            incident_queue.task_done()
+            shutdown = False
+            lines = []
+            try:
+                for incident_data in batch:
+                    if incident_data is None:
+                        shutdown = True
+                        break
+                    try:
+                        lines.append(persist_incident(incident_data))
+                    except Exception as e:
+                        console.error(f"   [ERROR] persist_incident failed: {e}")
+                if lines:
+                    payload = memoryview(b"".join(lines))
+                    while payload:
+                        payload = payload[os.write(fd, payload):]
+                    os.fsync(fd)
+            except OSError as e:
+                console.error(f"   [ERROR] Incident log sync failed: {e}")
+            finally:
+                for _ in batch:
+                    persist_queue.task_done()
+            if shutdown:
+                return
+    finally:
+        os.close(fd)
+
+def stage_worker(stage_queue: queue.Queue, handler) -> None:
+    """Run one pipeline stage until its shutdown signal"""
+    while True:
+        item = stage_queue.get()
+        try:
+            if item is None:
+                return
+            handler(item)
         except Exception as e:
-            print(f"   [ERROR] Worker Exception: {e}")
-            time.sleep(1)
-
-# Start the worker thread
-worker_thread = threading.Thread(target=log_worker, daemon=True)
-worker_thread.start()
+            console.error(f"   [ERROR] {handler.__name__} failed: {e}")
+        finally:
+            stage_queue.task_done()
 
 def on_suspicious_command(command: str, process_info: dict):
     """Handle suspicious command with v4.0 Logic and Deduplication Imaging"""
-    global detections, recent_commands, keywords
+    global detections
     
-    # Deduplication (Anti-Spam) — Bug 5 Fix: thread-safe + auto-pruning
-    cmd_key = f"{process_info.get('name')}:{command}"
-    now = time.time()
-    proc_name = process_info.get('name', 'Unknown')
+    # Deduplication (Anti-Spam) — Bug 5 Fix: thread-safe, bounded LRU instead of a full prune scan
+    cmd_key = (process_info.get('name'), command)
+    now = time.monotonic()
+    proc_name = process_info.get('name') or 'Unknown'
 
     with recent_commands_lock:
-        # Prune stale entries to prevent unbounded memory growth
-        stale_keys = [k for k, t in recent_commands.items() if now - t > DEDUPLICATION_WINDOW * 10]
-        for k in stale_keys:
-            del recent_commands[k]
-
-        if cmd_key in recent_commands and (now - recent_commands[cmd_key]) < DEDUPLICATION_WINDOW:
-            sys.stdout.write(".")
-            sys.stdout.flush()
+        last_seen = recent_commands.get(cmd_key)
+        if last_seen is not None and now - last_seen < DEDUPLICATION_WINDOW:
+            recent_commands.move_to_end(cmd_key)
+            console.info(".", extra={'end': ''})
             return
 
         recent_commands[cmd_key] = now
+        recent_commands.move_to_end(cmd_key)
+        while len(recent_commands) > RECENT_COMMANDS_MAX:
+            recent_commands.popitem(last=False)
 
     # FIXED: Whitelist Checks BEFORE incrementing counter (Bug 10)
     # 1. Ignore if it's our own process (SIEM/SIEM communication)
@@ -248,19 +377,32 @@ def on_suspicious_command(command: str, process_info: dict):
     if process_info.get('parent_pid') == MY_PID:
         return
 
+    # Lowercased once for both the self-exclusion check and keyword matching
+    cmd_lower = command.lower()
+    proc_lower = proc_name.lower()
+
     # 3. Double safety for snapshot commands
-    if "evidence\\emergency_snapshots" in command and ("shadownet_realtime.py" in command.lower() or "shadownet" in str(process_info.get('name', '')).lower()):
+    if "evidence\\emergency_snapshots" in command and ("shadownet_realtime.py" in cmd_lower or "shadownet" in proc_lower):
         return
 
     # FIXED: Robust Keyword Matching Logic
-    matched_keywords = []
-    cmd_lower = command.lower()
-    proc_lower = proc_name.lower()
-
-    for keyword in keywords:
-        kw_lower = keyword.lower()
-        if kw_lower in cmd_lower or kw_lower in proc_lower:
-            matched_keywords.append(keyword)
+    # Single pass over command and name; NUL keeps a keyword from spanning both
+    scan_text = f"{cmd_lower}\x00{proc_lower}"
+    if keyword_automaton is not None:
+        hits = {value for _, value in keyword_automaton.iter(scan_text)}
+        matched_keywords = [keyword for _, keyword in sorted(hits)]
+    elif keyword_hs_db is not None:
+        scratch = getattr(keyword_hs_local, 'scratch', None)
+        if scratch is None:
+            scratch = keyword_hs_local.scratch = hyperscan.Scratch(keyword_hs_db)
+        hit_ids = set()
+        keyword_hs_db.scan(scan_text.encode('utf-8', 'surrogateescape'),
+                           match_event_handler=lambda pattern_id, *_: hit_ids.add(pattern_id),
+                           scratch=scratch)
+        matched_keywords = [keywords[index] for index in sorted(hit_ids)]
+    else:
+        matched_keywords = [keyword for keyword, kw_lower in keywords_lower
+                            if kw_lower in cmd_lower or kw_lower in proc_lower]
 
     if not matched_keywords:
         return 
@@ -268,18 +410,18 @@ def on_suspicious_command(command: str, process_info: dict):
     # Increment detections only after passing whitelist
     detections += 1
     
-    print(f"\n⚡ DETECTION: {proc_name} matched keywords {matched_keywords}")
+    console.info(f"\n⚡ DETECTION: {proc_name} matched keywords {matched_keywords}")
     
     is_critical = True # Any keyword match is now considered critical for speed
     
-    print(f"\n{'='*80}")
-    print(f"🚨 KERNEL SIGNAL MATCHED (Instant Detection)")
-    print(f"{'='*80}")
-    print(f"Command: {command}")
-    print(f"System: {process_info.get('name')} (PID: {process_info.get('pid')})")
+    console.info(f"\n{'='*80}\n"
+                 f"🚨 KERNEL SIGNAL MATCHED (Instant Detection)\n"
+                 f"{'='*80}\n"
+                 f"Command: {command}\n"
+                 f"System: {process_info.get('name')} (PID: {process_info.get('pid')})")
     
     # 1. Trigger FOREGROUND Evidence Snapshot (Absolute priority)
-    print(f"⚡ TRIGGERING PROACTIVE EVIDENCE CAPTURE...")
+    console.info(f"⚡ TRIGGERING PROACTIVE EVIDENCE CAPTURE...")
     snapshot_id = "N/A"
     try:
         res = evidence_collector.on_threat_detected({
@@ -289,10 +431,10 @@ def on_suspicious_command(command: str, process_info: dict):
         if res.get('snapshot_taken'):
             snapshot_id = res.get('snapshot_id')
     except Exception as e:
-        print(f"   [WARN] Evidence Lag: {e}")
+        console.warning(f"   [WARN] Evidence Lag: {e}")
 
     # 2. Spawn ASYNC Analysis (Background)
-    print(f"📡 Dispatching to Gemini AI for deep analysis (Async)...")
+    console.info(f"📡 Dispatching to Gemini AI for deep analysis (Async)...")
     
     # Removed task_event race condition (Bug 1)
     
@@ -301,16 +443,17 @@ def on_suspicious_command(command: str, process_info: dict):
         'matched_keywords': matched_keywords,
         'process_info': process_info,
         'is_critical': is_critical,
-        'snapshot_id': snapshot_id
+        'snapshot_id': snapshot_id,
+        'detected_at': time.time()
     })
     
-    print(f"{'='*80}\n")
+    console.info(f"{'='*80}\n")
 
 def on_behavioral_alert(alert_data: dict):
     """Handle alerts from the Behavioral Monitor (Keyloggers/Bots)"""
-    print(f"\n🚨 [BEHAVIORAL ALERT] {alert_data['command']}")
-    print(f"   Severity: {alert_data['severity']}")
-    print(f"   AI Verdict: {alert_data['ai_analysis'].get('input_type', 'Unknown')}")
+    console.info(f"\n🚨 [BEHAVIORAL ALERT] {alert_data['command']}\n"
+                 f"   Severity: {alert_data['severity']}\n"
+                 f"   AI Verdict: {alert_data['ai_analysis'].get('input_type', 'Unknown')}")
     
     # Push to same incident queue
     # Bug 4 Fix: key was 'ai_res' but log_worker re-analyzes via ai_analyzer;
@@ -321,11 +464,132 @@ def on_behavioral_alert(alert_data: dict):
         'pre_analyzed': alert_data.get('ai_analysis', {}),  # stored for audit
         'process_info': alert_data['process_info'],
         'is_critical': True,
-        'snapshot_id': 'N/A'
+        'snapshot_id': 'N/A',
+        'detected_at': time.time()
     })
 
-# --- Start System ---
-if __name__ == "__main__":
+def main():
+    """Start ShadowNet: load config and components, start the workers and monitors, run until Ctrl+C"""
+    global config, keywords, keywords_lower, keyword_automaton, keyword_hs_db
+    global evidence_collector, ai_analyzer, siem, alert_mgr, incident_reporter, incident_pool, monitor
+    
+    # Load environment
+    load_dotenv()
+    print_header()
+    
+    # Check API key
+    api_key = os.getenv('GEMINI_API_KEY')
+    if not api_key:
+        print("❌ ERROR: GEMINI_API_KEY not found in .env file")
+        sys.exit(1)
+
+    print(f"[OK] API Key loaded: {api_key[:20]}...{api_key[-10:]}\n")
+
+    # --- Load Configuration ---
+    config = load_config(Path(__file__).parent / 'config' / 'config.yaml')
+
+    # FIXED: Robust keyword loading and validation (Bug 8)
+    keywords_config = config['shadownet']['monitoring'].get('suspicious_keywords', [])
+    if not keywords_config:
+        keywords = []
+    elif isinstance(keywords_config, str):
+        keywords = [keywords_config]
+    elif isinstance(keywords_config, list):
+        keywords = keywords_config
+    else:
+        print(f"⚠️  [WARN] Invalid keyword format: {type(keywords_config)}")
+        keywords = []
+
+    if not keywords:
+        print("❌ [ERROR] No keywords loaded from config!")
+        print("   Check config/config.yaml - 'suspicious_keywords' section")
+        sys.exit(1)
+
+    print(f"[OK] Loaded {len(keywords)} detection keywords")
+    keywords_lower = [(keyword, keyword.lower()) for keyword in keywords]
+
+    # One automaton over all keywords: values carry the config order for stable reporting
+    if HAS_AHOCORASICK and any(kw_lower for _, kw_lower in keywords_lower):
+        keyword_automaton = ahocorasick.Automaton()
+        for index, (keyword, kw_lower) in enumerate(keywords_lower):
+            if kw_lower:
+                keyword_automaton.add_word(kw_lower, (index, keyword))
+        keyword_automaton.make_automaton()
+
+    # Second choice without pyahocorasick: a Hyperscan literal database, pattern id = config index
+    if keyword_automaton is None and HAS_HYPERSCAN:
+        hs_keywords = [(index, kw_lower.encode('utf-8', 'surrogateescape'))
+                       for index, (_, kw_lower) in enumerate(keywords_lower) if kw_lower]
+        if hs_keywords:
+            try:
+                keyword_hs_db = hyperscan.Database()
+                keyword_hs_db.compile(
+                    expressions=[expression for _, expression in hs_keywords],
+                    ids=[index for index, _ in hs_keywords],
+                    elements=len(hs_keywords),
+                    flags=hyperscan.HS_FLAG_SINGLEMATCH,
+                    literal=True
+                )
+            except hyperscan.error as e:
+                print(f"⚠️  [WARN] Hyperscan keyword database failed ({e}), using substring scan")
+                keyword_hs_db = None
+
+    # FIXED: Admin Check Happening Early
+    is_root = is_admin()
+
+    print("\n" + "="*80)
+    print(f"✅ SHADOWNET v4.0 IS NOW ACTIVE ({'ADMIN/ROOT' if is_root else 'USER MODE'})")
+    if not is_root:
+        print("⚠️  WARNING: Running in USER MODE. Forensic commands (wevtutil) will NOT be detected.")
+    print("="*80)
+
+    # --- Initialize System Components ---
+    print("\n" + "!"*80)
+    print("🚀 SHADOWNET NEXUS v4.0 - ULTIMATE SPEED ENGINE STARTING...")
+    print("!"*80 + "\n")
+
+    # 1. Evidence Engine
+    capture_net = config['shadownet']['monitoring'].get('enable_network_monitoring', True)
+    evidence_collector = ProactiveEvidenceCollector(
+        evidence_vault_path="./evidence", 
+        enabled=True, 
+        capture_network=capture_net,
+        suspicious_keywords=keywords  # Pass ALL keywords from config
+    )
+    print(f"   [OK] Evidence Vault: {evidence_collector.os_type.upper()} Mode")
+
+    # 2. AI Command Engine
+    ai_analyzer = GeminiCommandAnalyzer(api_key)
+    print(f"   [OK] AI Command Analyzer: {ai_analyzer.model_name}")
+
+    # 3. Behavior Engine
+    behavior_analyzer = GeminiBehaviorAnalyzer(api_key)
+    print(f"   [OK] AI Behavior Analyzer: {behavior_analyzer.model_name}")
+
+    # 4. SIEM & Alerting Engine
+    siem = SIEMIntegration(config={'syslog_server': '127.0.0.1', 'syslog_port': 514})
+    alert_mgr = AlertManager(config={})
+    print(f"   [OK] SIEM/Alerting: Syslog & Multi-Channel Enabled")
+
+    # 5. Reporting Engine
+    report_gen = GeminiReportGenerator(api_key)
+    # append_jsonl: the incident folder keeps its own events.jsonl record now that the persist stage writes no incident.json
+    incident_reporter = IncidentReportGenerator(evidence_path="./evidence", append_jsonl=True)
+    print(f"   [OK] Reporting Engine: Forensic & Executive Ready")
+
+    console_listener.start()
+    
+    # Start the worker threads
+    incident_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='inc')  # transmit fan-out
+    worker_thread = threading.Thread(target=log_worker, daemon=True)
+    worker_thread.start()
+    stage_threads = [
+        threading.Thread(target=persist_worker, daemon=True),
+        threading.Thread(target=stage_worker, args=(transmit_queue, transmit_incident), daemon=True),
+    ]
+    for stage_thread in stage_threads:
+        stage_thread.start()
+
     # --- Start Monitoring Based on Config ---
     monitoring_config = config['shadownet']['monitoring']
     
@@ -360,10 +624,12 @@ if __name__ == "__main__":
     print("="*80)
     
     try:
+        # Wake once per status interval on a monotonic schedule (Ctrl+C still interrupts the sleep)
+        next_status = time.monotonic() + STATUS_CHECK_INTERVAL
         while True:
-            time.sleep(1)
-            if int(time.time()) % 60 == 0:
-                print(f"\n📊 {datetime.now().strftime('%H:%M:%S')} - Status: {detections} detections, {incident_queue.qsize()} pending reports...")
+            time.sleep(max(0.0, next_status - time.monotonic()))
+            next_status += STATUS_CHECK_INTERVAL
+            console.info(f"\n📊 {datetime.now().strftime('%H:%M:%S')} - Status: {detections} detections, {incident_queue.qsize()} pending reports, {stage_drops} dropped by full stages...")
 
     except KeyboardInterrupt:
         print("\n\n⏹️  Initiating Secure Shutdown...")
@@ -372,7 +638,16 @@ if __name__ == "__main__":
             monitor.stop_monitoring()
         incident_queue.put(None)
         worker_thread.join(timeout=SHUTDOWN_TIMEOUT)
+        for stage_thread in stage_threads:
+            stage_thread.join(timeout=SHUTDOWN_TIMEOUT)
+        incident_pool.shutdown(wait=False)
+        evidence_collector.close()  # snapshots still staged in the ring reach disk
+        console_listener.stop()  # drains queued messages before the final line
         print("\n👋 ShadowNet v4.0 shutdown complete\n")
     except Exception as e:
         print(f"\n❌ Fatal Error: {e}")
         sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -21,16 +21,39 @@ def print_banner():
     print("Watch your ShadowNet terminal for real-time alerts!")
     print("="*70 + "\n")
 
-def run_test(name, command, description):
+_shell = None  # One long-lived shell; each test command is still a real process it spawns
+
+def get_shell():
+    """Start (or restart) the persistent shell that test commands are written into"""
+    global _shell
+    if _shell is None or _shell.poll() is not None:
+        argv = ['cmd.exe', '/Q', '/K'] if os.name == 'nt' else ['bash']
+        _shell = subprocess.Popen(argv, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                                  stderr=subprocess.DEVNULL, text=True)
+    return _shell
+
+def run_test(name, command, description, fresh_spawn=False):
+    """
+    Fire one test command
+    
+    External tools go through the persistent shell (no shell start-up per test);
+    fresh_spawn=True keeps a dedicated `sh -c`/`cmd /c` process, needed for shell
+    builtins, which never exec and would otherwise be invisible to the monitor.
+    """
     print(f"👉 TESTING: {name}")
     print(f"   Description: {description}")
     print(f"   Command: {command}")
     
     try:
-        # We use subprocess.Popen to ensure it's a real process creation event for WMI
-        # and shell=True to allow command strings to execute.
         # We don't care if the command fails (access denied), detection happens at spawn.
-        subprocess.Popen(command, shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        if fresh_spawn:
+            subprocess.Popen(command, shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        else:
+            shell = get_shell()
+            # Detached from the shell's stdin so a command can't swallow later tests
+            line = f"{command} < NUL" if os.name == 'nt' else f"{command} < /dev/null &"
+            shell.stdin.write(line + "\n")
+            shell.stdin.flush()
         print("   ✅ [SENT] Waiting for system response...")
     except Exception as e:
         print(f"   ❌ [FAILED TO DISPATCH]: {e}")
@@ -59,8 +82,8 @@ def main():
         run_test("Shadow Copy Deletion", "vssadmin delete shadows /all /quiet", "Preventing recovery.")
         run_test("Registry Persistence", "reg add HKCU\\Software\\Microsoft\\Windows\\CurrentVersion\\Run /v Alert /t REG_SZ /d \"calc.exe\"", "Persistence.")
     else:
-        run_test("History Clearing", "history -c", "Wiping bash/zsh history.")
-        run_test("Cron Persistence", "echo '* * * * * root /tmp/evil' >> /etc/crontab", "Adding malicious cron job.")
+        run_test("History Clearing", "history -c", "Wiping bash/zsh history.", fresh_spawn=True)
+        run_test("Cron Persistence", "echo '* * * * * root /tmp/evil' >> /etc/crontab", "Adding malicious cron job.", fresh_spawn=True)
 
     # CATEGORY 3: CREDENTIAL ACCESS
     if os_type == "windows":
@@ -79,7 +102,7 @@ def main():
     print("   Description: Simulating bot-driven keystroke injection vs Human typing.")
     
     try:
-        import statistics
+        import numpy as np
         from core.gemini_behavior_analyzer import GeminiBehaviorAnalyzer
         from dotenv import load_dotenv
         load_dotenv()
@@ -91,7 +114,7 @@ def main():
         
         # 1. Local Statistical Check (Offline Defense)
         print("   [STEP 1] Running Local Jitter Analysis (Offline)...")
-        bot_std = statistics.stdev(bot_data)
+        bot_std = float(np.asarray(bot_data, dtype=np.float32).std(ddof=1))
         if bot_std < 10:
             print(f"   ✅ [LOCAL VERDICT] 🚨 KEYLOGGER DETECTED (StdDev: {bot_std:.2f}ms)")
         else:
@@ -140,6 +163,9 @@ def main():
     except Exception as e:
         print(f"   ⚠️  Behavioral Test Error: {e}")
 
+    if _shell is not None:
+        _shell.stdin.close()  # EOF ends the shell once its commands are done
+
     print("\n" + "="*70)
     print("🏁 COMPREHENSIVE TEST COMPLETE")
     print("Check the 'evidence/incidents' folder for generated forensic reports.")
@@ -2,18 +2,22 @@
 ShadowNet Nexus - Utility Modules
 """
 
-from .evidence_vault import EvidenceVault
+from .evidence_vault import EvidenceVault, atomic_write, EVIDENCE_FILE_MODE
 from .cache_manager import CacheManager
 from .os_detector import os_detector, OSDetector
 from .model_selector import ModelSelector, model_selector
 from .command_decoder import CommandDecoder
+from .config_loader import load_config
 
 __all__ = [
     'EvidenceVault',
+    'atomic_write',
+    'EVIDENCE_FILE_MODE',
     'CacheManager',
     'os_detector',
     'OSDetector',
     'ModelSelector',
     'model_selector',
-    'CommandDecoder'
+    'CommandDecoder',
+    'load_config'
 ]
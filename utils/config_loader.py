@@ -0,0 +1,34 @@
+"""
+Configuration Loader
+Parses config/config.yaml once per process with the libyaml-backed loader when available
+"""
+
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import yaml
+
+# libyaml's C parser is several times faster; pure-Python SafeLoader when PyYAML was built without it
+_Loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+DEFAULT_CONFIG_PATH = Path(__file__).resolve().parent.parent / 'config' / 'config.yaml'
+
+
+@lru_cache(maxsize=None)
+def _load(path: Path) -> Dict[str, Any]:
+    with open(path, 'rb') as f:
+        return yaml.load(f, Loader=_Loader) or {}
+
+
+def load_config(path: Optional[Path] = None) -> Dict[str, Any]:
+    """
+    Load the ShadowNet configuration (parsed on first use, cached afterwards)
+    
+    Args:
+        path: Config file to read (defaults to config/config.yaml)
+    
+    Returns:
+        Parsed configuration dict, shared by all callers; treat it as read-only
+    """
+    return _load(Path(path or DEFAULT_CONFIG_PATH).resolve())
@@ -4,14 +4,134 @@ Secure evidence preservation and chain of evidence trail management
 """
 
 import os
-import json
+import atexit
+import queue
+import tempfile
+import time
+import secrets
 import hashlib
 import shutil
 import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterable, List, Optional, Tuple, Union
 from pathlib import Path
 
+import orjson
+
+HASH_CHUNK_SIZE = 1 << 20  # 1 MiB reads feed OpenSSL's SHA-256 in large blocks (Python < 3.11 path)
+HASH_WORKERS = min(8, os.cpu_count() or 1)  # concurrent hashes in batch verification (OpenSSL drops the GIL)
+# Permission policy for every evidence file (vault records, trail, snapshot captures): owner
+# read/write, readable by other local accounts (analyst tooling); confidentiality is the vault
+# directory's job, not the individual file's
+EVIDENCE_FILE_MODE = 0o644
+TRAIL_COMMIT_MAX = 256  # queued trail writes folded into one write + fsync
+TRAIL_WRITE_ATTEMPTS = 3  # tries per batch before its bytes are held for the next flush
+TRAIL_RETRY_DELAY = 0.1  # seconds between trail write attempts
+
+_tmpfile_publish = hasattr(os, 'O_TMPFILE')  # cleared once linking an O_TMPFILE inode fails here
+_hash_buffers = threading.local()  # one reusable HASH_CHUNK_SIZE buffer per thread
+
+
+def _hash_buffer() -> memoryview:
+    """This thread's read buffer for hashing/copying (allocated once, reused across files)"""
+    view = getattr(_hash_buffers, 'view', None)
+    if view is None:
+        view = _hash_buffers.view = memoryview(bytearray(HASH_CHUNK_SIZE))
+    return view
+
+
+# Shared by every vault for concurrent file reads/hashes (threads are only started on first use)
+_IO_POOL = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="vault-io")
+
+
+def _dumps(obj: Any) -> bytes:
+    """Compact JSON bytes for evidence files (machine-read; smaller files also hash faster)"""
+    return orjson.dumps(obj, default=str, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+def _load(path: Path) -> Any:
+    """Parse a vault JSON file"""
+    with open(path, 'rb') as f:
+        return orjson.loads(f.read())
+
+
+def _write_fully(fd: int, payload: bytes):
+    view = memoryview(payload)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+def atomic_write(path: Path, payload: bytes, durable: bool = True):
+    """
+    Publish a file only once all its bytes are written, so a crash never leaves a truncated one
+    
+    Shared by the vault and the emergency snapshot engine. Every evidence file gets
+    EVIDENCE_FILE_MODE exactly (umask does not apply); an existing file is replaced atomically.
+    
+    Args:
+        path: Destination file
+        payload: Complete file contents
+        durable: fsync before the name appears (the snapshot hot path skips it)
+    """
+    global _tmpfile_publish
+    if _tmpfile_publish:
+        # Linux: write into an unnamed inode, then give it its name in one link
+        dir_fd = os.open(path.parent, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            try:
+                fd = os.open('.', os.O_TMPFILE | os.O_WRONLY, EVIDENCE_FILE_MODE, dir_fd=dir_fd)
+            except OSError:
+                fd = None  # filesystem without O_TMPFILE support
+            if fd is not None:
+                try:
+                    _write_fully(fd, payload)
+                    os.fchmod(fd, EVIDENCE_FILE_MODE)
+                    if durable:
+                        os.fsync(fd)
+                    # dst_dir_fd makes CPython use linkat(AT_SYMLINK_FOLLOW); plain link(2) on the
+                    # /proc symlink fails with EXDEV instead of linking the inode
+                    proc_path = f"/proc/self/fd/{fd}"
+                    try:
+                        try:
+                            os.link(proc_path, path.name, dst_dir_fd=dir_fd)
+                        except FileExistsError:
+                            # linkat never overwrites: link under a scratch name, then rename over the old file
+                            scratch = f".{path.name}.{fd}.tmp"
+                            os.link(proc_path, scratch, dst_dir_fd=dir_fd)
+                            os.replace(scratch, path.name, src_dir_fd=dir_fd, dst_dir_fd=dir_fd)
+                        return
+                    except OSError:
+                        _tmpfile_publish = False  # e.g. /proc not mounted: portable path from now on
+                finally:
+                    os.close(fd)
+        finally:
+            os.close(dir_fd)
+    
+    with tempfile.NamedTemporaryFile(dir=path.parent, prefix=f".{path.name}.", delete=False) as tmp:
+        tmp.write(payload)
+        tmp.flush()
+        if durable:
+            os.fsync(tmp.fileno())
+    try:
+        os.chmod(tmp.name, EVIDENCE_FILE_MODE)
+        os.replace(tmp.name, path)
+    except OSError:
+        os.unlink(tmp.name)
+        raise
+
+
+def _new_id(prefix: str, *parts: str):
+    """Time-ordered unique ID (nanosecond stamp + random suffix) and the datetime it was taken at"""
+    ts_ns = time.time_ns()
+    return "-".join((prefix, f"{ts_ns:020d}", *parts, secrets.token_hex(4))), datetime.fromtimestamp(ts_ns / 1e9)
+
+
+def _dumps_line(obj: Any) -> bytes:
+    """One compact JSON line for the append-only trail"""
+    return orjson.dumps(obj, default=str, option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_SERIALIZE_NUMPY)
+
 
 class EvidenceVault:
     """
@@ -28,21 +148,48 @@ class EvidenceVault:
         self.vault_path = Path(vault_path)
         self.vault_path.mkdir(parents=True, exist_ok=True)
         
-        # Create subdirectories
-        (self.vault_path / "incidents").mkdir(exist_ok=True)
-        (self.vault_path / "artifacts").mkdir(exist_ok=True)
-        (self.vault_path / "reports").mkdir(exist_ok=True)
-        (self.vault_path / "logs").mkdir(exist_ok=True)
-        
-        self.chain_of_evidence_trail_file = self.vault_path / "chain_of_evidence_trail.json"
+        # Create subdirectories (paths built once and reused)
+        self._incidents_dir = self.vault_path / "incidents"
+        self._artifacts_dir = self.vault_path / "artifacts"
+        self._reports_dir = self.vault_path / "reports"
+        self._logs_dir = self.vault_path / "logs"
+        for subdir in (self._incidents_dir, self._artifacts_dir, self._reports_dir, self._logs_dir):
+            subdir.mkdir(exist_ok=True)
+        
+        # Per-incident folders known to exist, so repeat preserves skip the mkdir syscall
+        with os.scandir(self._incidents_dir) as entries:
+            self._known_incident_dirs = {e.name for e in entries if e.is_dir()}
+        with os.scandir(self._artifacts_dir) as entries:
+            self._known_artifact_dirs = {e.name for e in entries if e.is_dir()}
+        
+        # Append-only JSON lines: recording an entry writes one line instead of rewriting the ledger
+        self.chain_of_evidence_trail_file = self.vault_path / "chain_of_evidence_trail.jsonl"
         self._trail_lock = threading.Lock()  # Bug 6 Fix: protect concurrent writes
+        self._batch_state = threading.local()  # per-thread pending entries inside batch()
+        # evidence_id -> (incident_id, hash_sha256, size_bytes, mtime_ns) of preserved evidence
+        self._trail_index: Dict[str, Tuple[str, str, Optional[int], Optional[int]]] = {}
+        self._trail_index_loaded = False
+        self._trail_index_offset = 0  # trail bytes already indexed; misses re-read from here
         self._init_chain_of_evidence_trail()
+        
+        # Group commit: callers enqueue serialized lines; one writer thread appends and fsyncs per batch
+        self._trail_queue: "queue.Queue[bytes]" = queue.Queue()
+        self._trail_unwritten = b""  # bytes of failed batches, written ahead of the next batch
+        self._trail_error: Optional[OSError] = None  # last write failure, raised by flush_evidence_trail
+        self._trail_fd = os.open(self.chain_of_evidence_trail_file,
+                                 os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, 'O_BINARY', 0), EVIDENCE_FILE_MODE)
+        threading.Thread(target=self._trail_writer, name="evidence-trail", daemon=True).start()
+        atexit.register(self.close)
     
     def _init_chain_of_evidence_trail(self):
-        """Initialize chain of evidence trail log"""
-        if not self.chain_of_evidence_trail_file.exists():
-            with open(self.chain_of_evidence_trail_file, 'w') as f:
-                json.dump([], f, indent=2)
+        """Initialize chain of evidence trail log (carrying over entries from the legacy JSON array file)"""
+        if self.chain_of_evidence_trail_file.exists():
+            return
+        
+        legacy_file = self.vault_path / "chain_of_evidence_trail.json"
+        entries = _load(legacy_file) if legacy_file.exists() else []
+        # Legacy file is left in place: it is itself evidence and must not be destroyed
+        self.chain_of_evidence_trail_file.write_bytes(b"".join(_dumps_line(e) for e in entries))
     
     def preserve_evidence(self, incident_id: str, evidence_data: Dict[str, Any], 
                          evidence_type: str = "general") -> str:
@@ -57,20 +204,21 @@ class EvidenceVault:
         Returns:
             Evidence ID
         """
-        timestamp = datetime.now()
-        evidence_id = f"EVD-{timestamp.strftime('%Y%m%d-%H%M%S')}-{evidence_type}"
+        # Second-resolution IDs collided (and overwrote files) when evidence arrived in bursts
+        evidence_id, timestamp = _new_id("EVD", evidence_type)
         
         # Create incident directory
-        incident_dir = self.vault_path / "incidents" / incident_id
-        incident_dir.mkdir(parents=True, exist_ok=True)
+        incident_dir = self._incidents_dir / incident_id
+        if incident_id not in self._known_incident_dirs:
+            incident_dir.mkdir(parents=True, exist_ok=True)
+            self._known_incident_dirs.add(incident_id)
         
-        # Save evidence
+        # Save evidence, hashing the exact bytes written (no read-back)
         evidence_file = incident_dir / f"{evidence_id}.json"
-        with open(evidence_file, 'w') as f:
-            json.dump(evidence_data, f, indent=2)
-        
-        # Calculate hash for integrity
-        evidence_hash = self._calculate_file_hash(evidence_file)
+        payload = _dumps(evidence_data)
+        evidence_hash = hashlib.sha256(payload).hexdigest()
+        atomic_write(evidence_file, payload)
+        stat = evidence_file.stat()
         
         # Record in chain of evidence trail
         evidence_trail_entry = {
@@ -80,6 +228,8 @@ class EvidenceVault:
             'timestamp': timestamp.isoformat(),
             'file_path': str(evidence_file),
             'hash_sha256': evidence_hash,
+            'size_bytes': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
             'collected_by': 'ShadowNet Nexus',
             'action': 'evidence_preserved'
         }
@@ -89,7 +239,7 @@ class EvidenceVault:
         return evidence_id
     
     def preserve_file_artifact(self, incident_id: str, source_file: str, 
-                              artifact_type: str = "file") -> str:
+                              artifact_type: str = "file", sha256: Optional[str] = None) -> str:
         """
         Preserve a file artifact
         
@@ -97,26 +247,30 @@ class EvidenceVault:
             incident_id: Incident identifier
             source_file: Path to source file
             artifact_type: Type of artifact
+            sha256: Hash of source_file if the caller already computed it (skips re-reading the copy)
         
         Returns:
             Artifact ID
         """
-        timestamp = datetime.now()
-        artifact_id = f"ART-{timestamp.strftime('%Y%m%d-%H%M%S')}-{artifact_type}"
+        artifact_id, timestamp = _new_id("ART", artifact_type)
         
         # Create artifact directory
-        artifact_dir = self.vault_path / "artifacts" / incident_id
-        artifact_dir.mkdir(parents=True, exist_ok=True)
+        artifact_dir = self._artifacts_dir / incident_id
+        if incident_id not in self._known_artifact_dirs:
+            artifact_dir.mkdir(parents=True, exist_ok=True)
+            self._known_artifact_dirs.add(incident_id)
         
         # Copy file
         source_path = Path(source_file)
         dest_file = artifact_dir / f"{artifact_id}_{source_path.name}"
         
         try:
-            shutil.copy2(source_file, dest_file)
-            
-            # Calculate hash
-            artifact_hash = self._calculate_file_hash(dest_file)
+            if sha256:
+                self._kernel_copy(source_path, dest_file)  # hash already known: bytes never enter userspace
+                artifact_hash = sha256
+            else:
+                artifact_hash = self._copy_and_hash(source_path, dest_file)
+            stat = dest_file.stat()
             
             # Record in chain of evidence trail
             evidence_trail_entry = {
@@ -127,6 +281,8 @@ class EvidenceVault:
                 'source_path': str(source_file),
                 'preserved_path': str(dest_file),
                 'hash_sha256': artifact_hash,
+                'size_bytes': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns,
                 'collected_by': 'ShadowNet Nexus',
                 'action': 'artifact_preserved'
             }
@@ -149,15 +305,11 @@ class EvidenceVault:
         Returns:
             Evidence data or None
         """
-        # Search for evidence file
-        for incident_dir in (self.vault_path / "incidents").iterdir():
-            if incident_dir.is_dir():
-                evidence_file = incident_dir / f"{evidence_id}.json"
-                if evidence_file.exists():
-                    with open(evidence_file, 'r') as f:
-                        return json.load(f)
-        
-        return None
+        evidence_file = self._indexed_evidence_file(evidence_id)
+        if evidence_file is None or not evidence_file.exists():
+            return None
+        
+        return _load(evidence_file)
     
     def get_incident_evidence(self, incident_id: str) -> List[Dict[str, Any]]:
         """
@@ -169,17 +321,17 @@ class EvidenceVault:
         Returns:
             List of evidence items
         """
-        incident_dir = self.vault_path / "incidents" / incident_id
+        incident_dir = self._incidents_dir / incident_id
         
-        if not incident_dir.exists():
+        if incident_id not in self._known_incident_dirs and not incident_dir.exists():
             return []
         
-        evidence_list = []
-        for evidence_file in incident_dir.glob("*.json"):
-            with open(evidence_file, 'r') as f:
-                evidence_list.append(json.load(f))
+        with os.scandir(incident_dir) as entries:
+            paths = [entry.path for entry in entries if entry.name.endswith('.json') and entry.is_file()]
         
-        return evidence_list
+        if len(paths) < 2:
+            return [_load(path) for path in paths]
+        return list(_IO_POOL.map(_load, paths))
     
     def get_chain_of_evidence_trail(self, incident_id: Optional[str] = None) -> List[Dict[str, Any]]:
         """
@@ -191,87 +343,298 @@ class EvidenceVault:
         Returns:
             Chain of evidence trail entries
         """
-        with open(self.chain_of_evidence_trail_file, 'r') as f:
-            all_entries = json.load(f)
-        
-        if incident_id:
-            return [e for e in all_entries if e.get('incident_id') == incident_id]
-        
-        return all_entries
+        self.flush_evidence_trail()
+        
+        # Lines are compact orjson, so a matching entry must contain this exact byte sequence;
+        # non-matching lines are skipped without being parsed
+        needle = b'"incident_id":' + orjson.dumps(incident_id) if incident_id is not None else b''
+        entries = []
+        with open(self.chain_of_evidence_trail_file, 'rb') as f:
+            for line in f:
+                if not line.strip() or needle not in line:
+                    continue
+                entry = orjson.loads(line)
+                if incident_id is None or entry.get('incident_id') == incident_id:
+                    entries.append(entry)
+        
+        return entries
     
-    def verify_evidence_integrity(self, evidence_id: str) -> bool:
+    def verify_evidence_integrity(self, evidence_id: str, fast: bool = False) -> bool:
         """
         Verify evidence has not been tampered with
         
         Args:
             evidence_id: Evidence identifier
+            fast: Accept an unchanged size + mtime as verified and re-hash only on a mismatch
+                  (quick health check; formal audits should keep the default full SHA-256)
         
         Returns:
             True if integrity verified
         """
-        # Find evidence file
-        for incident_dir in (self.vault_path / "incidents").iterdir():
-            if incident_dir.is_dir():
-                evidence_file = incident_dir / f"{evidence_id}.json"
-                if evidence_file.exists():
-                    # Calculate current hash
-                    current_hash = self._calculate_file_hash(evidence_file)
-                    
-                    # Get original hash from chain of evidence trail
-                    evidence_trail = self.get_chain_of_evidence_trail()
-                    for entry in evidence_trail:
-                        if entry.get('evidence_id') == evidence_id:
-                            original_hash = entry.get('hash_sha256')
-                            return current_hash == original_hash
-        
-        return False
+        evidence_file = self._indexed_evidence_file(evidence_id)
+        if evidence_file is None or not evidence_file.exists():
+            return False
+        if fast and self._unchanged_since_preserve(evidence_id, evidence_file):
+            return True
+        
+        # Compare the current hash with the one recorded in the chain of evidence trail
+        original_hash = self._trail_index[evidence_id][1]
+        return self._calculate_file_hash(evidence_file) == original_hash
+    
+    def verify_evidence_integrity_batch(self, evidence_ids: Iterable[str], fast: bool = False) -> Dict[str, bool]:
+        """
+        Verify several evidence files, hashing them concurrently
+        
+        Args:
+            evidence_ids: Evidence identifiers
+            fast: As for verify_evidence_integrity
+        
+        Returns:
+            {evidence_id: True if integrity verified}
+        """
+        results = {}
+        jobs = []
+        for evidence_id in evidence_ids:
+            evidence_file = self._indexed_evidence_file(evidence_id)
+            if evidence_file is None or not evidence_file.exists():
+                results[evidence_id] = False
+            elif fast and self._unchanged_since_preserve(evidence_id, evidence_file):
+                results[evidence_id] = True
+            else:
+                jobs.append((evidence_id, evidence_file))
+        
+        hashes = _IO_POOL.map(self._calculate_file_hash, [path for _, path in jobs])
+        for (evidence_id, _), current_hash in zip(jobs, hashes):
+            results[evidence_id] = current_hash == self._trail_index[evidence_id][1]
+        
+        return results
+    
+    def verify_all(self, incident_id: str, fast: bool = False) -> Dict[str, bool]:
+        """
+        Verify every evidence file preserved for an incident
+        
+        Args:
+            incident_id: Incident identifier
+            fast: As for verify_evidence_integrity
+        
+        Returns:
+            {evidence_id: True if integrity verified}
+        """
+        evidence_ids = [e['evidence_id'] for e in self.get_chain_of_evidence_trail(incident_id)
+                        if e.get('action') == 'evidence_preserved']
+        return self.verify_evidence_integrity_batch(dict.fromkeys(evidence_ids), fast=fast)
+    
+    def _indexed_evidence_file(self, evidence_id: str) -> Optional[Path]:
+        """Resolve a preserved evidence file from the trail index (no directory scan)"""
+        with self._trail_lock:
+            if not self._trail_index_loaded:
+                self._load_trail_index()
+            indexed = self._trail_index.get(evidence_id)
+            if indexed is None:
+                # Another vault instance or process may have preserved it since the last read
+                self._load_trail_index()
+                indexed = self._trail_index.get(evidence_id)
+        
+        if indexed is None:
+            return None
+        return self._incidents_dir / indexed[0] / f"{evidence_id}.json"
+    
+    def _unchanged_since_preserve(self, evidence_id: str, evidence_file: Path) -> bool:
+        """Size and mtime still match the trail entry (entries from before they were recorded never match)"""
+        _, _, size, mtime_ns = self._trail_index[evidence_id]
+        if size is None or mtime_ns is None:
+            return False
+        stat = evidence_file.stat()
+        return stat.st_size == size and stat.st_mtime_ns == mtime_ns
+    
+    def _load_trail_index(self):
+        """Index trail lines appended since the last load, parsing only evidence_preserved lines"""
+        self.flush_evidence_trail()
+        with open(self.chain_of_evidence_trail_file, 'rb') as f:
+            f.seek(self._trail_index_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # another writer's line still being appended: read it next time
+                self._trail_index_offset += len(line)
+                if b'"action":"evidence_preserved"' in line:
+                    self._index_trail_entry(orjson.loads(line))
+        self._trail_index_loaded = True
+    
+    def _index_trail_entry(self, entry: Dict[str, Any]):
+        # First entry wins, matching the original first-match scan of the trail
+        if entry.get('action') == 'evidence_preserved':
+            self._trail_index.setdefault(entry['evidence_id'], (entry['incident_id'], entry.get('hash_sha256'),
+                                                                entry.get('size_bytes'), entry.get('mtime_ns')))
+    
+    @staticmethod
+    def _kernel_copy(source: Path, dest: Path):
+        """Copy a file with copy_file_range (reflink on Btrfs/XFS), falling back to shutil"""
+        if hasattr(os, 'copy_file_range'):
+            try:
+                with open(source, 'rb') as src, open(dest, 'wb') as dst:
+                    while os.copy_file_range(src.fileno(), dst.fileno(), 1 << 30):
+                        pass
+                shutil.copystat(source, dest)
+                return
+            except OSError:
+                pass  # e.g. cross-device on older kernels, or unsupported filesystem: redo with shutil
+        shutil.copy2(source, dest)
+    
+    def _copy_and_hash(self, source: Path, dest: Path) -> str:
+        """Copy a file and SHA-256 the bytes in the same pass (no second read of the copy)"""
+        sha256_hash = hashlib.sha256()
+        view = _hash_buffer()
+        with open(source, 'rb') as src, open(dest, 'wb') as dst:
+            while True:
+                n = src.readinto(view)
+                if not n:
+                    break
+                chunk = view if n == HASH_CHUNK_SIZE else view[:n]  # slice only the short tail
+                sha256_hash.update(chunk)
+                dst.write(chunk)
+        shutil.copystat(source, dest)
+        return sha256_hash.hexdigest()
     
     def _calculate_file_hash(self, file_path: Path) -> str:
         """Calculate SHA-256 hash of file"""
-        sha256_hash = hashlib.sha256()
         with open(file_path, "rb") as f:
-            for byte_block in iter(lambda: f.read(4096), b""):
-                sha256_hash.update(byte_block)
-        return sha256_hash.hexdigest()
+            if hasattr(hashlib, 'file_digest'):  # Python 3.11+: read/update loop runs in C
+                return hashlib.file_digest(f, 'sha256').hexdigest()
+            
+            sha256_hash = hashlib.sha256()
+            view = _hash_buffer()
+            while True:
+                n = f.readinto(view)
+                if not n:
+                    break
+                sha256_hash.update(view if n == HASH_CHUNK_SIZE else view[:n])
+            return sha256_hash.hexdigest()
+    
+    @contextmanager
+    def batch(self):
+        """
+        Group several vault operations so their trail entries are appended together
+        
+        Entries recorded by this thread inside the block are held back and
+        flushed together on exit (even if the block raises).
+        
+        Returns:
+            This vault, for use as `with vault.batch() as tx: tx.save_report(...)`
+        """
+        if getattr(self._batch_state, 'pending', None) is not None:
+            yield self  # nested: the outermost batch flushes
+            return
+        
+        self._batch_state.pending = []
+        try:
+            yield self
+        finally:
+            pending, self._batch_state.pending = self._batch_state.pending, None
+            if pending:
+                self._write_evidence_trail_entries(pending)
     
     def _add_evidence_trail_entry(self, entry: Dict[str, Any]):
         """Add entry to chain of evidence trail (thread-safe)"""
-        # Bug 6 Fix: Lock ensures only one thread reads/writes the file at a time
+        pending = getattr(self._batch_state, 'pending', None)
+        if pending is not None:
+            pending.append(entry)
+            return
+        self._write_evidence_trail_entries([entry])
+    
+    def _write_evidence_trail_entries(self, entries: List[Dict[str, Any]]):
+        lines = b"".join(_dumps_line(e) for e in entries)
+        # Bug 6 Fix: Lock keeps the queued order and the index in step across threads
         with self._trail_lock:
-            with open(self.chain_of_evidence_trail_file, 'r') as f:
-                evidence_trail = json.load(f)
-
-            evidence_trail.append(entry)
-
-            with open(self.chain_of_evidence_trail_file, 'w') as f:
-                json.dump(evidence_trail, f, indent=2)
+            if self._trail_fd is None:
+                raise ValueError("Evidence vault is closed")
+            self._trail_queue.put(lines)
+            if self._trail_index_loaded:
+                for entry in entries:
+                    self._index_trail_entry(entry)
+    
+    def _trail_writer(self):
+        """Append queued trail lines; one write and one fsync for everything queued since the last sync"""
+        while True:
+            batch = [self._trail_queue.get()]
+            while len(batch) < TRAIL_COMMIT_MAX:
+                try:
+                    batch.append(self._trail_queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                # Records are never dropped: failed bytes (only the unwritten tail) stay queued for retry
+                payload = memoryview(self._trail_unwritten + b"".join(batch))
+                for attempt in range(TRAIL_WRITE_ATTEMPTS):
+                    try:
+                        while payload:
+                            payload = payload[os.write(self._trail_fd, payload):]
+                        os.fsync(self._trail_fd)
+                        self._trail_error = None
+                        break
+                    except OSError as e:
+                        self._trail_error = e
+                        if attempt + 1 < TRAIL_WRITE_ATTEMPTS:
+                            time.sleep(TRAIL_RETRY_DELAY)
+                else:
+                    print(f"⚠️  [WARN] Chain of evidence trail write failed, {len(payload)} bytes held "
+                          f"for retry: {self._trail_error}")
+                self._trail_unwritten = bytes(payload)
+            finally:
+                for _ in batch:
+                    self._trail_queue.task_done()
     
-    def save_report(self, incident_id: str, report_content: str, 
+    def flush_evidence_trail(self):
+        """
+        Block until every recorded trail entry is on disk (call before shutdown or reading the file)
+        
+        Raises:
+            OSError: The trail could not be written; the unwritten entries are kept for the next flush
+        """
+        if self._trail_error is not None:
+            self._trail_queue.put(b"")  # wake the writer to retry what it holds
+        self._trail_queue.join()
+        if self._trail_error is not None:
+            raise OSError(f"Chain of evidence trail not fully written: {self._trail_error}") from self._trail_error
+    
+    def close(self):
+        """Flush pending trail entries and release the trail file descriptor (kept open if the flush fails)"""
+        with self._trail_lock:
+            if self._trail_fd is None:
+                return
+            self.flush_evidence_trail()
+            os.close(self._trail_fd)
+            self._trail_fd = None
+        atexit.unregister(self.close)
+    
+    def save_report(self, incident_id: str, report_content: Union[str, Iterable[str]], 
                    report_type: str = "technical") -> str:
         """
         Save generated report
         
         Args:
             incident_id: Incident identifier
-            report_content: Report text
+            report_content: Report text, or its chunks in order (written without joining)
             report_type: Type of report
         
         Returns:
             Report file path
         """
-        timestamp = datetime.now()
-        report_file = self.vault_path / "reports" / f"{incident_id}_{report_type}_{timestamp.strftime('%Y%m%d-%H%M%S')}.md"
+        report_id, timestamp = _new_id("REP")
+        report_file = self._reports_dir / f"{incident_id}_{report_type}_{timestamp.strftime('%Y%m%d-%H%M%S')}.md"
         
-        # Write report first
-        with open(report_file, 'w', encoding='utf-8') as f:
-            f.write(report_content)
+        # Write report, hashing each encoded chunk as it goes out (no read-back)
+        sha256_hash = hashlib.sha256()
+        with open(report_file, 'wb') as f:
+            for chunk in ((report_content,) if isinstance(report_content, str) else report_content):
+                data = chunk.encode('utf-8')
+                sha256_hash.update(data)
+                f.write(data)
             
         # Bug 9 Fix: Log ALL report types in evidence trail, not just 'forensic'
-        with open(report_file, 'rb') as f:
-            file_hash = hashlib.sha256(f.read()).hexdigest()
+        file_hash = sha256_hash.hexdigest()
 
         self._add_evidence_trail_entry({
-            'evidence_id': f"REP-{timestamp.strftime('%Y%m%d-%H%M%S')}",
+            'evidence_id': report_id,
             'incident_id': incident_id,
             'evidence_type': report_type,
             'timestamp': timestamp.isoformat(),
@@ -285,14 +648,22 @@ class EvidenceVault:
     
     def get_vault_stats(self) -> Dict[str, Any]:
         """Get evidence vault statistics"""
-        incidents = list((self.vault_path / "incidents").iterdir())
-        artifacts = list((self.vault_path / "artifacts").iterdir())
-        reports = list((self.vault_path / "reports").iterdir())
-        
         return {
-            'total_incidents': len(incidents),
-            'total_artifacts': len(artifacts),
-            'total_reports': len(reports),
+            'total_incidents': self._count_entries(self._incidents_dir),
+            'total_artifacts': self._count_entries(self._artifacts_dir),
+            'total_reports': self._count_entries(self._reports_dir),
             'vault_path': str(self.vault_path),
-            'chain_of_evidence_trail_entries': len(self.get_chain_of_evidence_trail())
+            'chain_of_evidence_trail_entries': self._count_trail_entries()
         }
+    
+    def _count_trail_entries(self) -> int:
+        """Count trail records (one per non-blank line) without parsing them"""
+        self.flush_evidence_trail()
+        with open(self.chain_of_evidence_trail_file, 'rb') as f:
+            return sum(1 for line in f if line.strip())
+    
+    @staticmethod
+    def _count_entries(directory: Path) -> int:
+        """Count directory entries without building Path objects"""
+        with os.scandir(directory) as entries:
+            return sum(1 for _ in entries)